@@ -13,6 +13,10 @@ question on Piazza.
 from consts import *
 from game2d import *
 from wave import *
+from hud import *
+from replay import *
+import os
+import time
 
 
 # PRIMARY RULE: Invaders can only access attributes in wave.py via getters/setters
@@ -79,6 +83,43 @@ class Invaders(GameApp):
     #Attribute _win: accumulator which tells if the player won the game or not
     #Invariant: _win is a boolean
 
+    #Attribute _audio: the sound effects, loaded once when the game starts
+    #Invariant: _audio is an AudioBank
+
+    #Attribute _atlas: the images of the game, loaded once when the game
+    #                  starts
+    #Invariant: _atlas is the TextureAtlas of GAME_IMAGES from loadAtlas
+
+    #Attribute _hud: the messages shown on screen, each made only once
+    #Invariant: _hud is a Hud
+
+    #Attribute _recorder: the input of the current wave, tick by tick, so that
+    #                     the wave can be replayed
+    #Invariant: _recorder is an InputRecorder for the last wave started, or
+    #           None before the first wave
+
+    #Attribute _profiler: the time of each phase of the current wave's updates
+    #Invariant: _profiler is a PhaseProfiler for the last wave started, or
+    #           None if PROFILE_DIR is None or before the first wave
+
+    #Attribute _wavestore: the one Wave every wave is played in, started
+    #                      over with reset for each new wave (_wave is this
+    #                      Wave while a wave is on, and None between waves)
+    #Invariant: _wavestore is a Wave, or None before the first wave
+
+    #Attribute _started: the perf_counter time the current wave was started,
+    #                    until its first frame is drawn
+    #Invariant: _started is a float, or None once the first frame of the
+    #           wave is drawn (or before the first wave)
+
+    #Attribute _firstframes: the seconds from starting each wave to drawing
+    #                        its first frame, so that the cost of starting a
+    #                        wave can be watched as the wave number grows
+    #Invariant: _firstframes is a dict mapping wave numbers to floats
+
+    #Attribute _lag: the time that has passed but not been simulated yet
+    #Invariant: _lag is a float 0 <= _lag < 1 / TICK_RATE between frames
+
     # DO NOT MAKE A NEW INITIALIZER!
 
     # THREE MAIN GAMEAPP METHODS
@@ -100,12 +141,21 @@ class Invaders(GameApp):
         self._state = 0
         self._lastkeys = 0
         self._wave = None
+        self._hud = Hud()
         if self._state == STATE_INACTIVE:
-            self._text = GLabel(text = "Press 'S' to start Wave 1",
-            font_size=50, font_name = "Arcade.ttf", left=100, bottom=300)
+            self._text = self._hud.getLabel('start',
+            "Press 'S' to start Wave 1", left=100, bottom=300)
         self._paused = False
         self._win = False
         self._wavenumber = 1
+        self._audio = AudioBank()
+        self._atlas = loadAtlas()
+        self._recorder = None
+        self._profiler = None
+        self._wavestore = None
+        self._started = None
+        self._firstframes = {}
+        self._lag = 0.0
 
 
     def update(self,dt):
@@ -166,7 +216,7 @@ class Invaders(GameApp):
         if self._state == STATE_NEWWAVE:
             self.pass_STATE_NEWWAVE()
         if self._state == STATE_ACTIVE:
-            self._wave.update(self.input, dt)
+            self._simulate(dt)
             if self._wave.getShip() == None:
                 if self._wave.getLives() > 0:
                     self._state = STATE_PAUSED
@@ -174,14 +224,17 @@ class Invaders(GameApp):
                 if self._wave.getLives() == 0:
                     self._state = STATE_COMPLETE
                     self._wave = None
+                    self._saveWave()
             elif self._wave.getPlayerwin():
                 self._state = STATE_COMPLETE
                 self._wave = None
                 self._win = True
+                self._saveWave()
             elif self._wave.getAlienwin():
                 self._state = STATE_COMPLETE
                 self._wave = None
                 self._win = False
+                self._saveWave()
         if self._state == STATE_ACTIVE:
             self._checkPaused()
         if self._state == STATE_PAUSED:
@@ -211,7 +264,11 @@ class Invaders(GameApp):
             self._text.draw(self.view)
         if self._wave != None:
             self._text = None
-            self._wave.draw(self.view)
+            self._wave.draw(self.view, self._lag * TICK_RATE)
+            if self._started != None:
+                self._firstframes[self._wavenumber] = (time.perf_counter() -
+                self._started)
+                self._started = None
 
 
 
@@ -231,6 +288,76 @@ class Invaders(GameApp):
             self._text= None
 
 
+    def _simulate(self, dt):
+        """ Updates the wave once for every tick (of 1 / TICK_RATE seconds)
+        that has passed, so that the game runs at the same speed whatever the
+        frame rate. Time left over that is less than a tick is kept in _lag
+        for the next frame, and tells draw how far to glide the ship and bolts.
+
+        At most TICK_CATCHUP ticks are run in one frame. If the game falls
+        further behind than that, the extra time is dropped. The updates also
+        stop as soon as the ship is destroyed or the wave is won or lost, so
+        that update can change the state right away.
+
+        Parameter dt: The time in seconds since last update
+        Precondition: dt is a number (int or float)
+        """
+        tick = 1 / TICK_RATE
+        self._lag += dt
+        ticks = 0
+        while self._lag >= tick and ticks < TICK_CATCHUP:
+            self._recorder.record(self.input, self._wave)
+            self._wave.update(self.input, tick)
+            self._lag -= tick
+            ticks += 1
+            if (self._wave.getShip() == None or self._wave.getPlayerwin() or
+                self._wave.getAlienwin()):
+                self._lag = 0.0
+                break
+        if self._lag >= tick:
+            self._lag %= tick
+
+
+    def _saveWave(self):
+        """ Saves what was recorded of the wave that just ended: its replay
+        (see _saveReplay) and its profile (see _saveProfile).
+        """
+        self._saveReplay()
+        self._saveProfile()
+
+
+    def _saveProfile(self):
+        """ Saves the profile of the wave that just ended in PROFILE_DIR, as a
+        Chrome trace and a histogram named for its wave number and seed. The
+        histogram ends with the time every wave so far took to its first
+        frame. Nothing is saved if PROFILE_DIR is None.
+        """
+        if self._profiler == None:
+            return
+        name = 'wave%d-%d' % (self._recorder.getWavenumber(),
+        self._recorder.getSeed())
+        with open(os.path.join(PROFILE_DIR, name + '.json'), 'w') as stream:
+            self._profiler.writeTrace(stream)
+        with open(os.path.join(PROFILE_DIR, name + '.txt'), 'w') as stream:
+            stream.write(self._profiler.histogram() + '\n')
+            for number in sorted(self._firstframes):
+                stream.write('first frame of wave %d: %.3f ms\n' % (number,
+                self._firstframes[number] * 1e3))
+
+
+    def _saveReplay(self):
+        """ Saves the recording of the wave that just ended as a replay file
+        in REPLAY_DIR, named for its wave number and seed. Nothing is saved if
+        REPLAY_DIR is None.
+        """
+        if REPLAY_DIR == None:
+            return
+        name = 'wave%d-%d.rpl' % (self._recorder.getWavenumber(),
+        self._recorder.getSeed())
+        with open(os.path.join(REPLAY_DIR, name), 'wb') as stream:
+            self._recorder.save(stream)
+
+
     def _checkPaused(self):
         """ During a Wave, this method is checking for an attempt to pause the
         game with a single key press of 'p'. When it detects a pause attempt, this
@@ -251,8 +378,7 @@ class Invaders(GameApp):
             self._state = STATE_CONTINUE
         if self._wave != None:
             if self._wave.getShip() == None and self._paused == False:
-                self._wave.setShip(Ship(x = GAME_WIDTH // 2, y = SHIP_BOTTOM,
-                width = SHIP_WIDTH, height = SHIP_HEIGHT, source = 'ship.png'))
+                self._wave.spawnShip()
                 self._state = STATE_CONTINUE
         self._lastkeys = curr_keys
 
@@ -260,8 +386,23 @@ class Invaders(GameApp):
     def pass_STATE_NEWWAVE(self):
         """This method starts a new Wave of when called. The number of lives of
         each Wave created after the first is set by the Lives setter in wave.py.
+
+        The Wave is only made for the first wave. Every later wave starts the
+        same one over (see Wave.reset), so nothing is built or loaded.
         """
-        self._wave = Wave()
+        self._started = time.perf_counter()
+        if self._wavestore == None:
+            self._wavestore = Wave(self._wavenumber, audio = self._audio,
+            atlas = self._atlas)
+        else:
+            self._wavestore.reset(self._wavenumber)
+        self._wave = self._wavestore
+        self._recorder = InputRecorder(self._wave.getSeed(), self._wavenumber,
+        self._wave.getRows(), self._wave.getPerrow(), self._wave.getSpeed())
+        if PROFILE_DIR != None:
+            self._profiler = PhaseProfiler()
+            self._wave.setProfiler(self._profiler)
+        self._lag = 0.0
         self._paused = False
         self._state = STATE_ACTIVE
 
@@ -273,9 +414,9 @@ class Invaders(GameApp):
         helper _checkPaused(). When the game is unpaused by the player, this method
         sets the state to STATE_CONTINUE for the game to be resumed.
         """
-        self._text = GLabel(text = "Press 'P' to continue. \n You have " +
-        str(self._wave.getLives()) + " lives remaining.",
-        font_size=50, font_name = "Arcade.ttf", left=350, bottom=500)
+        self._text = self._hud.getLabel('paused',
+        "Press 'P' to continue. \n You have " +
+        str(self._wave.getLives()) + " lives remaining.", left=350, bottom=500)
         self._checkPaused()
         if self._paused == False:
             self._state = STATE_CONTINUE
@@ -285,15 +426,14 @@ class Invaders(GameApp):
         """This method checks whether the Wave was won or lost and pastes
         a message to the screen accordingly."""
         if self._win == False:
-            self._text = GLabel(text = "You lost!",
-            font_size=50, font_name = "Arcade.ttf", left=250, bottom=300)
+            self._text = self._hud.getLabel('lost', "You lost!",
+            left=250, bottom=300)
         if self._win:
-            self._text = GLabel(text = "You won! Press S to start Wave " +
-            str(self._wavenumber + 1),
-            font_size=50, font_name = "Arcade.ttf", left=0, bottom=300)
+            self._text = self._hud.getLabel('won',
+            "You won! Press S to start Wave " + str(self._wavenumber + 1),
+            left=0, bottom=300)
             curr_keys = self.input.key_count
             if self.input.is_key_down('s') and self._lastkeys == 0:
-                self.pass_STATE_NEWWAVE()
                 self._wavenumber += 1
-                self._wave.setWavenumber(self._wavenumber)
+                self.pass_STATE_NEWWAVE()
             self._lastkeys = curr_keys
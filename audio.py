@@ -0,0 +1,89 @@
+"""
+Audio module for Alien Invaders
+
+This module contains the class AudioBank, which loads every sound effect of the
+game once, when the game starts. Building a Sound reads and decodes its file,
+so doing that at the moment a bolt is fired or an alien is hit makes the frame
+stall. The bank instead replays Sounds it already has.
+
+A Sound that is still playing cannot also start over, so the bank keeps a few
+copies (voices) of each effect and takes turns with them. That way effects that
+overlap, like pops from aliens hit in quick succession, are all heard.
+"""
+from consts import *
+try:
+    from game2d import *
+except ImportError:
+    # game2d needs Kivy. A disabled bank never builds a Sound, so it can
+    # still be made without either (as a headless Wave does).
+    pass
+
+
+class AudioBank(object):
+    """
+    A class to play the sound effects of the game from Sounds loaded once.
+
+    A disabled bank loads nothing and plays nothing. This is what a headless
+    simulation wants, as it should not touch the audio device at all.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _voices: the loaded copies of each sound effect
+    # Invariant: _voices is a dict mapping each file name in SOUND_EFFECTS to
+    # a list of SOUND_VOICES Sound objects (empty if the bank is disabled)
+    #
+    # Attribute _next: the copy of each sound effect to play next
+    # Invariant: _next is a dict mapping each key of _voices to an int index
+    # into its list
+    #
+    # Attribute _enabled: whether the bank plays sounds
+    # Invariant: _enabled is a boolean
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def isEnabled(self):
+        """
+        Getter that returns if this bank plays sounds.
+        """
+        return self._enabled
+
+
+    def __init__(self, enabled=True, sources=SOUND_EFFECTS,
+                 voices=SOUND_VOICES):
+        """
+        Initializes a bank, loading every sound effect if it is enabled.
+
+        Parameter enabled: whether to load and play sounds
+        Precondition: enabled is a boolean
+
+        Parameter sources: the sound files to load
+        Precondition: sources is a tuple of sound files with extension .wav
+
+        Parameter voices: the number of copies of each sound to load
+        Precondition: voices is an int >= 1
+        """
+        self._enabled = enabled
+        self._voices = {}
+        self._next = {}
+        for source in sources:
+            if enabled:
+                self._voices[source] = [Sound(source) for _ in range(voices)]
+            else:
+                self._voices[source] = []
+            self._next[source] = 0
+
+
+    def play(self, source):
+        """
+        Plays the sound effect in the given file, if this bank is enabled.
+
+        Each call uses the next copy of that effect, so a copy that is still
+        playing is only cut off after every other copy has been used.
+
+        Parameter source: the sound file to play
+        Precondition: source is one of the files this bank was made with
+        """
+        if not self._enabled:
+            return
+        voices = self._voices[source]
+        index = self._next[source]
+        voices[index].play()
+        self._next[source] = (index + 1) % len(voices)
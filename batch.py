@@ -0,0 +1,223 @@
+"""
+Batch simulation module for Alien Invaders
+
+This module plays many headless games at once, each a single Wave played by
+a bot (see bots.py), spread over every core of the machine with a process
+pool. It is used to balance waves (how often does a bot win with 6 rows at
+speed 0.5?) and to load test the simulation.
+
+A game is described by a dict of the arguments of simulateGame, like
+
+    {'seed': 7, 'rows': 5, 'perrow': 11, 'speed': 1.0, 'policy': 'hunter'}
+
+and its result is a dict with the same entries plus ticks (the ticks the game
+lasted), killed (the aliens shot down), won, lost, lives (the lives left) and
+tps (the ticks simulated per second). simulateBatch hands out the games and
+yields each result as soon as it is done, in whatever order they finish.
+
+It can also be run from the folder with the game modules:
+
+    python batch.py --games=1000 --rows=3,5 --policy=random,hunter
+
+which prints one line of JSON per game and a summary at the end. Options are
+used rather than plain numbers because consts.py reads plain numbers on the
+command line as the size of the formation.
+"""
+from consts import *
+from headless import *
+from wave import *
+from bots import *
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import concurrent.futures
+
+
+def simulateGame(seed, rows=ALIEN_ROWS, perrow=ALIENS_IN_ROW,
+                 speed=ALIEN_SPEED, policy='hunter', wavenumber=1,
+                 ticks=BATCH_TICKS):
+    """
+    Plays one headless game with a bot and returns its result.
+
+    Parameter seed: the seed of the wave and the bot
+    Precondition: seed is an int
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter perrow: the number of aliens in each row
+    Precondition: perrow is an int > 0
+
+    Parameter speed: the seconds between alien steps in the first wave
+    Precondition: speed is a float > 0
+
+    Parameter policy: the name of the bot that plays
+    Precondition: policy is a key of POLICIES
+
+    Parameter wavenumber: the wave number of the wave
+    Precondition: wavenumber is an int >= 1
+
+    Parameter ticks: the most ticks to play
+    Precondition: ticks is an int > 0
+    """
+    bot = POLICIES[policy](seed)
+    wave = Wave(wavenumber, headless=True, seed=seed, rows=rows,
+        perrow=perrow, speed=speed)
+    start = time.perf_counter()
+    played = run(wave, (bot.keys(wave) for _ in range(ticks)))
+    seconds = time.perf_counter() - start
+    return {'seed': seed, 'rows': rows, 'perrow': perrow, 'speed': speed,
+        'policy': policy, 'wavenumber': wavenumber, 'ticks': played,
+        'killed': rows * perrow - wave.getFormation().getCount(),
+        'won': wave.getPlayerwin(),
+        'lost': wave.getAlienwin() or wave.getLives() == 0,
+        'lives': wave.getLives(),
+        'tps': played / seconds if seconds > 0 else 0.0}
+
+
+def simulateBatch(games, workers=None, chunk=BATCH_CHUNK):
+    """
+    Yields the result of every game in games, as each one finishes.
+
+    The games are played by a pool of worker processes, chunk games to a
+    task. Games are only taken from games as workers need them (a couple of
+    tasks per worker are kept waiting), so games can be a generator of any
+    length. If the caller stops early, the games not yet started are dropped.
+
+    Parameter games: the games to play
+    Precondition: games is an iterable of dicts of arguments of simulateGame
+
+    Parameter workers: the number of processes to use (if None, one for each
+    core of the machine)
+    Precondition: workers is an int > 0 or None
+
+    Parameter chunk: the number of games each task plays
+    Precondition: chunk is an int > 0
+    """
+    if workers == None:
+        workers = os.cpu_count() or 1
+    games = iter(games)
+    pending = set()
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    tasks = list(itertools.islice(games, chunk))
+                    if not tasks:
+                        break
+                    pending.add(executor.submit(_simulateChunk, tasks))
+                if not pending:
+                    return
+                done, pending = concurrent.futures.wait(pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _simulateChunk(games):
+    """
+    Returns the results of playing the given games, in order.
+
+    This is what a worker process runs for each task.
+
+    Parameter games: the games to play
+    Precondition: games is a list of dicts of arguments of simulateGame
+    """
+    return [simulateGame(**game) for game in games]
+
+
+def _games(count, rows, perrow, speeds, policies, seed):
+    """
+    Yields count games for every combination of the given settings.
+
+    The games of a combination have the seeds seed, seed + 1, and so on.
+
+    Parameter count: the number of games of each combination
+    Precondition: count is an int > 0
+
+    Parameter rows: the numbers of rows of aliens to try
+    Precondition: rows is a list of ints > 0
+
+    Parameter perrow: the numbers of aliens in each row to try
+    Precondition: perrow is a list of ints > 0
+
+    Parameter speeds: the alien speeds to try
+    Precondition: speeds is a list of floats > 0
+
+    Parameter policies: the bots to try
+    Precondition: policies is a list of keys of POLICIES
+
+    Parameter seed: the seed of the first game of each combination
+    Precondition: seed is an int
+    """
+    for settings in itertools.product(rows, perrow, speeds, policies):
+        for number in range(count):
+            yield {'seed': seed + number, 'rows': settings[0],
+                'perrow': settings[1], 'speed': settings[2],
+                'policy': settings[3]}
+
+
+def _numbers(text, kind):
+    """
+    Returns the comma-separated numbers in text as a list.
+
+    Parameter text: the text to read
+    Precondition: text is a string of numbers separated by commas
+
+    Parameter kind: the type of the numbers
+    Precondition: kind is int or float
+    """
+    return [kind(item) for item in text.split(',')]
+
+
+def main():
+    """
+    Plays the batch of games given on the command line.
+    """
+    parser = argparse.ArgumentParser(description='Play headless games '
+        'of Alien Invaders with bots, on every core.')
+    parser.add_argument('--games', type=int, default=100,
+        help='games for each combination of settings')
+    parser.add_argument('--rows', default=str(ALIEN_ROWS),
+        help='rows of aliens, separated by commas')
+    parser.add_argument('--perrow', default=str(ALIENS_IN_ROW),
+        help='aliens in each row, separated by commas')
+    parser.add_argument('--speed', default=str(ALIEN_SPEED),
+        help='alien speeds, separated by commas')
+    parser.add_argument('--policy', default='hunter',
+        help='bots, separated by commas: ' + ', '.join(sorted(POLICIES)))
+    parser.add_argument('--seed', type=int, default=0,
+        help='seed of the first game of each combination')
+    parser.add_argument('--workers', type=int, default=None,
+        help='processes to use (default: one per core)')
+    args = parser.parse_args()
+    policies = args.policy.split(',')
+    for policy in policies:
+        if policy not in POLICIES:
+            parser.error('unknown policy ' + repr(policy))
+    games = _games(args.games, _numbers(args.rows, int),
+        _numbers(args.perrow, int), _numbers(args.speed, float), policies,
+        args.seed)
+    start = time.perf_counter()
+    played = 0
+    won = 0
+    ticks = 0
+    for result in simulateBatch(games, args.workers):
+        print(json.dumps(result))
+        played += 1
+        won += result['won']
+        ticks += result['ticks']
+    seconds = time.perf_counter() - start
+    print('%d games, %d won, %d ticks in %.2fs (%.0f ticks/s)' % (played,
+        won, ticks, seconds, ticks / seconds if seconds > 0 else 0.0),
+        file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Collision microbenchmark for Alien Invaders
+
+This script times the collision tests between laser bolts and aliens, both the
+plain-number path in collision.py that the simulation uses and the reference
+path through Alien.collides (and so GImage.contains) in models.py. It prints
+the time each path takes per million bolt/alien pairs.
+
+Run it from the folder with the game modules:
+
+    python benchmarks/bench_collision.py --pairs=1000000
+
+The reference path needs game2d (and Kivy). Without it, only the plain-number
+path is timed.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consts import *
+from collision import *
+from headless import *
+
+
+def _pairs(count, seed):
+    """
+    Returns a list of count (alien x, alien y, bolt x, bolt y) tuples.
+
+    The bolts are scattered around the aliens so that about half of the pairs
+    collide.
+
+    Parameter count: the number of pairs
+    Precondition: count is an int > 0
+
+    Parameter seed: the seed for the positions
+    Precondition: seed is an int
+    """
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        ax = rng.uniform(ALIEN_WIDTH, GAME_WIDTH - ALIEN_WIDTH)
+        ay = rng.uniform(DEFENSE_LINE, GAME_HEIGHT - ALIEN_CEILING)
+        bx = ax + rng.uniform(-ALIEN_WIDTH, ALIEN_WIDTH)
+        by = ay + rng.uniform(-ALIEN_HEIGHT, ALIEN_HEIGHT)
+        result.append((ax, ay, bx, by))
+    return result
+
+
+def timeOverlaps(pairs):
+    """
+    Returns (seconds, hits) to test every pair with collision.overlaps.
+
+    Parameter pairs: the pairs to test
+    Precondition: pairs is a list returned by _pairs
+    """
+    ahw = ALIEN_WIDTH / 2
+    ahh = ALIEN_HEIGHT / 2
+    bhw = BOLT_WIDTH / 2
+    bhh = BOLT_HEIGHT / 2
+    hits = 0
+    start = time.perf_counter()
+    for ax, ay, bx, by in pairs:
+        if overlaps(ax, ay, ahw, ahh, bx, by, bhw, bhh):
+            hits += 1
+    return time.perf_counter() - start, hits
+
+
+def timeReference(pairs):
+    """
+    Returns (seconds, hits) to test every pair with Alien.collides, or None
+    if game2d cannot be loaded.
+
+    Parameter pairs: the pairs to test
+    Precondition: pairs is a list returned by _pairs
+    """
+    try:
+        from models import Alien, Bolt
+        alien = Alien(x=0, y=0, width=ALIEN_WIDTH, height=ALIEN_HEIGHT,
+            source=ALIEN_IMAGES[0])
+        bolt = Bolt(x=0, y=0, width=BOLT_WIDTH, height=BOLT_HEIGHT,
+            fillcolor='blue', linewidth=10, velocity=BOLT_SPEED)
+    except Exception:
+        return None
+    hits = 0
+    start = time.perf_counter()
+    for ax, ay, bx, by in pairs:
+        alien.x = ax
+        alien.y = ay
+        bolt.x = bx
+        bolt.y = by
+        if alien.collides(bolt):
+            hits += 1
+    return time.perf_counter() - start, hits
+
+
+def main():
+    """
+    Runs the benchmark and prints the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--pairs', type=int, default=1000000,
+        help='the number of bolt/alien pairs to test')
+    parser.add_argument('--seed', type=int, default=0,
+        help='the seed for the bolt and alien positions')
+    args = parser.parse_args()
+
+    pairs = _pairs(args.pairs, args.seed)
+    scale = 1000000 / args.pairs
+    results = [('overlaps', timeOverlaps(pairs)),
+               ('Alien.collides', timeReference(pairs))]
+    for name, result in results:
+        if result is None:
+            print('%-16s skipped (game2d is not available)' % name)
+        else:
+            seconds, hits = result
+            print('%-16s %8.3f s per million pairs  (%d hits)' %
+                (name, seconds * scale, hits))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+"""
+Wave benchmark suite for Alien Invaders
+
+This script times the hot paths of a headless Wave (a whole update, the alien
+march in each direction, an alien shot, the player bolts against the aliens
+and the win checks) and Alien.collides, over formations from 1x1 to 10x15 and
+from 0 to 1000 bolts on screen. Each case is timed one call at a time, and
+the wave is put back in the same state (with Wave.restore) before every call,
+so every call does the same work.
+
+Run it from the folder with the game modules:
+
+    python benchmarks/bench_wave.py --output=results.json
+    python benchmarks/bench_wave.py --baseline=results.json
+
+The results are written as JSON: the machine they ran on, then the median and
+fastest seconds per call of each case. A game never has more than BOLT_LIMIT
+bolts on screen, so the cases with more are flagged as above_limit: they
+time the bolt loops past what the game can reach. The shoot case is always
+run below the limit (with BOLT_LIMIT-1 bolts in place of any more), as the
+aliens do not shoot at all once it is reached. With --baseline, every case is also
+compared to the same case in an earlier results file, and the script exits
+with status 1 if any got slower by more than --threshold. Alien.collides
+needs game2d (and Kivy), and is skipped without it.
+
+Only options are taken on the command line, as consts.py reads plain numbers
+there as the size of the formation.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consts import *
+from headless import *
+from wave import *
+import numpy
+
+# The formations (rows, aliens in each row) and bolt counts of every case
+SIZES = ((1, 1), (3, 5), (5, 11), (10, 15))
+BOLTS = (0, 10, 100, 1000)
+
+
+def _wave(rows, perrow, bolts, seed, player=0.5):
+    """
+    Returns a headless wave with the given formation and bolts on screen.
+
+    The player bolts are scattered over the formation, so that some of them
+    hit, and the alien bolts over the whole screen.
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter perrow: the number of aliens in each row
+    Precondition: perrow is an int > 0
+
+    Parameter bolts: the number of bolts on screen
+    Precondition: bolts is an int >= 0
+
+    Parameter seed: the seed of the wave and the bolt positions
+    Precondition: seed is an int
+
+    Parameter player: the share of the bolts fired by the player
+    Precondition: player is a float 0 <= player <= 1
+    """
+    rng = random.Random(seed)
+    wave = Wave(headless=True, seed=seed, rows=rows, perrow=perrow)
+    formation = wave.getFormation()
+    top = float(formation.y[0, 0]) + ALIEN_HEIGHT
+    bottom = float(formation.y[-1, 0]) - ALIEN_HEIGHT
+    for number in range(bolts):
+        if number < bolts * player:
+            x = rng.uniform(formation.getLeft() - ALIEN_WIDTH,
+                formation.getRight() + ALIEN_WIDTH)
+            y = rng.uniform(bottom, top)
+            velocity = BOLT_SPEED
+        else:
+            x = rng.uniform(0, GAME_WIDTH)
+            y = rng.uniform(0, GAME_HEIGHT)
+            velocity = -BOLT_SPEED
+        wave.getBolts().append(wave.getPool().acquire(x, y, velocity))
+    return wave
+
+
+def _update(wave):
+    """
+    Returns a function that updates wave for one tick of moving and firing.
+
+    Parameter wave: the wave to update
+    Precondition: wave is a headless Wave object
+    """
+    input = ScriptedInput(('left', 'spacebar'))
+    return lambda: wave.update(input, HEADLESS_DT)
+
+
+def _shoot(wave):
+    """
+    Returns a function that makes the aliens of wave take a shot.
+
+    Parameter wave: the wave to shoot from
+    Precondition: wave is a headless Wave object
+    """
+    def shoot():
+        wave._steps = wave._interval + 1
+        wave._shootfromAliens()
+    return shoot
+
+
+def _wins(wave):
+    """
+    Returns a function that checks whether either side of wave has won.
+
+    Parameter wave: the wave to check
+    Precondition: wave is a headless Wave object
+    """
+    def wins():
+        wave._playerWins()
+        wave._alienWins()
+    return wins
+
+
+# The cases timed on a wave: name, share of player bolts, function to time
+WAVE_CASES = (
+    ('update', 0.5, _update),
+    ('march_right', 0.5, lambda wave: wave._animatealienright),
+    ('march_left', 0.5, lambda wave: wave._animateAlienleft),
+    ('shoot', 0.5, _shoot),
+    ('ship_bolts', 1.0, lambda wave: wave._handleShipBolts),
+    ('wins', 0.5, _wins))
+
+
+def timeCase(wave, call, budget):
+    """
+    Returns (median, fastest, calls) seconds per call of call on wave.
+
+    wave is restored to the state it had at the start before every call, and
+    calls are made until budget seconds have been spent in them (and at least
+    five times), or until restoring has taken ten times that.
+
+    Parameter wave: the wave that call works on
+    Precondition: wave is a headless Wave object
+
+    Parameter call: the function to time
+    Precondition: call is a function of no arguments
+
+    Parameter budget: the seconds to spend timing
+    Precondition: budget is a float > 0
+    """
+    state = wave.snapshot()
+    times = []
+    spent = 0.0
+    limit = time.perf_counter() + budget * 10
+    while (spent < budget and time.perf_counter() < limit) or len(times) < 5:
+        wave.restore(state)
+        start = time.perf_counter()
+        call()
+        seconds = time.perf_counter() - start
+        times.append(seconds)
+        spent += seconds
+    times.sort()
+    return times[len(times) // 2], times[0], len(times)
+
+
+def timeCollides(bolts, seed, budget):
+    """
+    Returns (median, fastest, calls) seconds to test bolts bolts against an
+    alien with Alien.collides, or None if game2d cannot be loaded.
+
+    Parameter bolts: the number of bolts to test
+    Precondition: bolts is an int >= 0
+
+    Parameter seed: the seed for the bolt positions
+    Precondition: seed is an int
+
+    Parameter budget: the seconds to spend timing
+    Precondition: budget is a float > 0
+    """
+    try:
+        from models import Alien, Bolt
+        alien = Alien(x=GAME_WIDTH / 2, y=GAME_HEIGHT / 2, width=ALIEN_WIDTH,
+            height=ALIEN_HEIGHT, source=ALIEN_IMAGES[0])
+        rng = random.Random(seed)
+        shots = [Bolt(x=alien.x + rng.uniform(-ALIEN_WIDTH, ALIEN_WIDTH),
+            y=alien.y + rng.uniform(-ALIEN_HEIGHT, ALIEN_HEIGHT),
+            width=BOLT_WIDTH, height=BOLT_HEIGHT, fillcolor='blue',
+            linewidth=10, velocity=BOLT_SPEED) for _ in range(bolts)]
+    except Exception:
+        return None
+    def collides():
+        for bolt in shots:
+            alien.collides(bolt)
+    times = []
+    spent = 0.0
+    while spent < budget or len(times) < 5:
+        start = time.perf_counter()
+        collides()
+        seconds = time.perf_counter() - start
+        times.append(seconds)
+        spent += seconds
+    times.sort()
+    return times[len(times) // 2], times[0], len(times)
+
+
+def runSuite(budget, seed, match=None):
+    """
+    Returns the results of every case as a list of dicts.
+
+    Parameter budget: the seconds to spend timing each case
+    Precondition: budget is a float > 0
+
+    Parameter seed: the seed of the waves and bolt positions
+    Precondition: seed is an int
+
+    Parameter match: only cases whose name contains this are run (all of
+    them if None)
+    Precondition: match is a string or None
+    """
+    results = []
+    done = set()
+    for rows, perrow in SIZES:
+        for bolts in BOLTS:
+            for name, player, make in WAVE_CASES:
+                count = bolts
+                if name == 'shoot':
+                    # At the limit, _shootfromAliens just returns
+                    count = min(bolts, BOLT_LIMIT - 1)
+                key = '%s/%dx%d/%d' % (name, rows, perrow, count)
+                if key in done or (match != None and match not in key):
+                    continue
+                done.add(key)
+                wave = _wave(rows, perrow, count, seed, player)
+                result = timeCase(wave, make(wave), budget)
+                results.append(_result(key, name, rows, perrow, count,
+                    result))
+    for bolts in BOLTS:
+        key = 'alien_collides/1x1/%d' % bolts
+        if match != None and match not in key:
+            continue
+        result = timeCollides(bolts, seed, budget)
+        if result != None:
+            results.append(_result(key, 'alien_collides', 1, 1, bolts,
+                result))
+    return results
+
+
+def _result(key, name, rows, perrow, bolts, result):
+    """
+    Returns the dict written to the JSON file for one case.
+
+    The case is flagged as above_limit if it has more bolts on screen than
+    the game ever does.
+
+    Parameter key: the name of the case, with its sizes
+    Precondition: key is a string
+
+    Parameter name: the name of what is timed
+    Precondition: name is a string
+
+    Parameter rows, perrow, bolts: the sizes of the case
+    Precondition: each is an int >= 0
+
+    Parameter result: the timing of the case
+    Precondition: result is a (median, fastest, calls) tuple
+    """
+    return {'key': key, 'name': name, 'rows': rows, 'perrow': perrow,
+        'bolts': bolts, 'above_limit': bolts > BOLT_LIMIT,
+        'median': result[0], 'fastest': result[1], 'calls': result[2]}
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints each case next to its baseline and returns the keys of the ones
+    that got slower by more than threshold.
+
+    Cases are compared by their median. Cases missing from either side are
+    listed but never count as slower.
+
+    Parameter results: the results of this run
+    Precondition: results is a list returned by runSuite
+
+    Parameter baseline: the results of an earlier run
+    Precondition: baseline is a list returned by runSuite
+
+    Parameter threshold: the slowdown allowed, as a share of the baseline
+    Precondition: threshold is a float >= 0
+    """
+    before = dict((result['key'], result) for result in baseline)
+    slower = []
+    for result in results:
+        old = before.pop(result['key'], None)
+        if old == None:
+            print('%-32s %12.3f us  (new)' % (result['key'],
+                result['median'] * 1e6))
+            continue
+        ratio = result['median'] / old['median'] if old['median'] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            slower.append(result['key'])
+            flag = '  SLOWER'
+        print('%-32s %12.3f us  %12.3f us  %6.2fx%s' % (result['key'],
+            result['median'] * 1e6, old['median'] * 1e6, ratio, flag))
+    for key in sorted(before):
+        print('%-32s (missing)' % key)
+    return slower
+
+
+def main():
+    """
+    Runs the benchmark suite, and writes or compares the results.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--output', default=None,
+        help='the JSON file to write the results to')
+    parser.add_argument('--baseline', default=None,
+        help='a JSON file of earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.20,
+        help='the slowdown allowed against the baseline (0.20 is 20%%)')
+    parser.add_argument('--budget', type=float, default=0.05,
+        help='the seconds to spend timing each case')
+    parser.add_argument('--match', default=None,
+        help='only run the cases whose name contains this')
+    parser.add_argument('--seed', type=int, default=0,
+        help='the seed for the waves and bolt positions')
+    args = parser.parse_args()
+
+    results = runSuite(args.budget, args.seed, args.match)
+    report = {'machine': {'python': platform.python_version(),
+        'numpy': numpy.__version__, 'platform': platform.platform(),
+        'processor': platform.processor()},
+        'budget': args.budget, 'seed': args.seed, 'results': results}
+    if args.output != None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1)
+    if args.baseline != None:
+        with open(args.baseline) as file:
+            baseline = [result for result in json.load(file)['results']
+                if args.match == None or args.match in result['key']]
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print('%d cases slower than the baseline' % len(slower))
+            sys.exit(1)
+    else:
+        for result in results:
+            print('%-32s %12.3f us' % (result['key'], result['median'] * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Bots module for Alien Invaders
+
+This module contains the bots that play a headless Wave in batch simulations
+(see batch.py). A bot is asked once per tick for the keys to hold down, given
+the wave as it is before that tick. Each bot has its own seeded random
+numbers, so a game played by a bot with the same seed plays out the same way
+every time.
+
+Bots are named in POLICIES, so that a batch of games can say which bot plays
+each game with a plain string, which can be sent to another process.
+"""
+from consts import *
+import random
+
+# PRIMARY RULE: Bots can only access a Wave through its getters, like Invaders.
+
+
+class IdleBot(object):
+    """
+    A bot that never touches the keys.
+
+    The aliens always win against it, so it shows how long a wave takes to
+    reach the defense line (or to shoot down every ship).
+    """
+
+    def __init__(self, seed):
+        """
+        Initializes an idle bot.
+
+        Parameter seed: the seed for the random numbers of the bot (unused)
+        Precondition: seed is an int
+        """
+        pass
+
+
+    def keys(self, wave):
+        """
+        Returns the keys to hold down this tick, which is none.
+
+        Parameter wave: the wave being played
+        Precondition: wave is a Wave object
+        """
+        return ()
+
+
+class RandomBot(object):
+    """
+    A bot that mashes the keys.
+
+    Every BOT_HOLD ticks it picks a new direction to move (or none) and
+    whether to fire, and holds those keys until the next pick.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _random: the random numbers of this bot
+    # Invariant: _random is a random.Random
+    #
+    # Attribute _keys: the keys held down since the last pick
+    # Invariant: _keys is a tuple of key names
+    #
+    # Attribute _ticks: the number of ticks until the next pick
+    # Invariant: _ticks is an int >= 0
+
+    def __init__(self, seed):
+        """
+        Initializes a random bot.
+
+        Parameter seed: the seed for the random numbers of the bot
+        Precondition: seed is an int
+        """
+        self._random = random.Random(seed)
+        self._keys = ()
+        self._ticks = 0
+
+
+    def keys(self, wave):
+        """
+        Returns the keys to hold down this tick.
+
+        Parameter wave: the wave being played
+        Precondition: wave is a Wave object
+        """
+        if self._ticks == 0:
+            keys = [self._random.choice(('left', 'right', None))]
+            if self._random.random() < 0.5:
+                keys.append('spacebar')
+            self._keys = tuple(key for key in keys if key != None)
+            self._ticks = BOT_HOLD
+        self._ticks -= 1
+        return self._keys
+
+
+class HunterBot(object):
+    """
+    A bot that moves under the nearest column of aliens and fires at it.
+
+    It aims at the lowest alien of the column closest to the ship, and fires
+    whenever the ship is under that alien. It does not dodge. Now and then it
+    waits a tick, so that games with different seeds do not all play out
+    alike.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _random: the random numbers of this bot
+    # Invariant: _random is a random.Random
+
+    def __init__(self, seed):
+        """
+        Initializes a hunter bot.
+
+        Parameter seed: the seed for the random numbers of the bot
+        Precondition: seed is an int
+        """
+        self._random = random.Random(seed)
+
+
+    def keys(self, wave):
+        """
+        Returns the keys to hold down this tick.
+
+        Parameter wave: the wave being played
+        Precondition: wave is a Wave object
+        """
+        ship = wave.getShip()
+        formation = wave.getFormation()
+        if ship == None or formation.getCount() == 0:
+            return ()
+        if self._random.random() < BOT_IDLE:
+            return ()
+        target = None
+        for col in formation.getColumns():
+            x = float(formation.x[formation.getLowest(col), col])
+            if target == None or abs(x - ship.x) < abs(target - ship.x):
+                target = x
+        if abs(target - ship.x) <= SHIP_MOVEMENT:
+            return ('spacebar',)
+        if target < ship.x:
+            return ('left',)
+        return ('right',)
+
+
+# The bots by name, as given to simulateGame
+POLICIES = {'idle': IdleBot, 'random': RandomBot, 'hunter': HunterBot}
@@ -0,0 +1,126 @@
+"""
+Collision module for Alien Invaders
+
+This module contains the collision tests used by the simulation. They work on
+plain numbers (a center, a half-width and a half-height for each box) rather
+than on GObjects, so they run the same in a headless Wave as in a real one.
+
+The collides methods of Ship and Alien in models.py go through GImage.contains
+four times, once per corner of the bolt. That is the reference for these tests,
+but it runs through the game2d transform machinery on every call. As long as
+the bolt is thinner and shorter than what it hits (which is true of every bolt,
+ship and alien in consts.py), a corner of the bolt is inside the other box
+exactly when the two boxes overlap, which is what overlaps tests.
+
+batchHits makes the same test for every bolt against every target at once
+with NumPy. Wave does not use it: a game never has enough bolts on screen for
+it to beat the tests above (or the grid lookup of Formation.hit), and it
+settles a target hit by several bolts differently from testing them in turn
+(see its docstring). It is kept for tools that test many boxes at once.
+"""
+from consts import *
+import numpy
+
+# PRIMARY RULE: Like models.py, this module may only access consts.py.
+
+
+def overlaps(ax, ay, ahw, ahh, bx, by, bhw, bhh):
+    """
+    Returns True if the box a overlaps the box b (touching counts).
+
+    Parameter ax: the x coordinate of the center of box a
+    Precondition: ax is an int or float
+
+    Parameter ay: the y coordinate of the center of box a
+    Precondition: ay is an int or float
+
+    Parameter ahw: half of the width of box a
+    Precondition: ahw is an int or float >= 0
+
+    Parameter ahh: half of the height of box a
+    Precondition: ahh is an int or float >= 0
+
+    Parameter bx: the x coordinate of the center of box b
+    Precondition: bx is an int or float
+
+    Parameter by: the y coordinate of the center of box b
+    Precondition: by is an int or float
+
+    Parameter bhw: half of the width of box b
+    Precondition: bhw is an int or float >= 0
+
+    Parameter bhh: half of the height of box b
+    Precondition: bhh is an int or float >= 0
+    """
+    return abs(ax - bx) <= ahw + bhw and abs(ay - by) <= ahh + bhh
+
+
+def boltHitsShip(ship, bolt):
+    """
+    Returns True if the alien bolt collides with the ship.
+
+    This method returns False if bolt was fired by the player. It is the same
+    test as Ship.collides, without GImage.contains.
+
+    Parameter ship: the ship to check
+    Precondition: ship is a Ship or HeadlessShip
+
+    Parameter bolt: The laser bolt to check
+    Precondition: bolt is a Bolt or HeadlessBolt
+    """
+    return not bolt.isPlayerBolt() and overlaps(ship.x, ship.y,
+        SHIP_WIDTH / 2, SHIP_HEIGHT / 2, bolt.x, bolt.y,
+        BOLT_WIDTH / 2, BOLT_HEIGHT / 2)
+
+
+def boltBoxes(bolts):
+    """
+    Returns the boxes of the given bolts as an array for batchHits.
+
+    Parameter bolts: the bolts to convert
+    Precondition: bolts is a list of Bolt or HeadlessBolt objects
+    """
+    boxes = numpy.empty((len(bolts), 4))
+    boxes[:, 0] = [bolt.x for bolt in bolts]
+    boxes[:, 1] = [bolt.y for bolt in bolts]
+    boxes[:, 2] = BOLT_WIDTH / 2
+    boxes[:, 3] = BOLT_HEIGHT / 2
+    return boxes
+
+
+def batchHits(bolts, targets):
+    """
+    Returns the pairs (bolt indices, target indices) of bolts that hit targets.
+
+    Every bolt is tested against every target with one NumPy operation, using
+    the same test as overlaps. Each bolt hits the first target it overlaps
+    (the lowest index), and each target can only be hit once: if several
+    bolts hit the same target, the earliest bolt gets it. Unlike testing the
+    bolts one at a time, a later bolt that loses its target this way hits
+    nothing, even if it overlaps another target, so it stays in play to be
+    tested again. Both results are int arrays of the same length, in
+    increasing bolt order (empty if there are no bolts or no targets).
+
+    Which bolts may hit which targets is up to the caller: pass only player
+    bolts with alien targets, or only alien bolts with the ship.
+
+    Parameter bolts: the boxes of the bolts, one row (x, y, half width,
+    half height) per bolt
+    Precondition: bolts is a float array of shape (n, 4)
+
+    Parameter targets: the boxes of the targets, in the same form as bolts
+    Precondition: targets is a float array of shape (m, 4)
+    """
+    if len(bolts) == 0 or len(targets) == 0:
+        return numpy.zeros(0, dtype=int), numpy.zeros(0, dtype=int)
+    near = numpy.abs(bolts[:, None, 0] - targets[None, :, 0]) <= \
+        bolts[:, None, 2] + targets[None, :, 2]
+    near &= numpy.abs(bolts[:, None, 1] - targets[None, :, 1]) <= \
+        bolts[:, None, 3] + targets[None, :, 3]
+    hitters = numpy.flatnonzero(near.any(axis=1))
+    first = near[hitters].argmax(axis=1)
+    # Sorted by target, then bolt, the first of each target is its earliest
+    order = numpy.lexsort((hitters, first))
+    index = numpy.unique(first[order], return_index=True)[1]
+    keep = numpy.sort(order[index])
+    return hitters[keep], first[keep]
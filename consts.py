@@ -26,6 +26,8 @@ GAME_HEIGHT = 700
 SHIP_WIDTH    = 44
 # the height of the ship
 SHIP_HEIGHT   = 44
+# the image file for the ship
+SHIP_IMAGE    = 'ship.png'
 # the distance of the (bottom of the) ship from the bottom of the screen
 SHIP_BOTTOM   = 32
 # The number of pixels to move the ship per update
@@ -59,6 +61,8 @@ ALIEN_ROWS     = 5
 ALIENS_IN_ROW  = 12
 # the image files for the aliens (bottom to top)
 ALIEN_IMAGES   = ('alien1.png','alien2.png','alien3.png')
+# every image file of the game, loaded into one atlas when the game starts
+GAME_IMAGES    = (SHIP_IMAGE,) + ALIEN_IMAGES
 # the number of seconds (0 < float <= 1) between alien steps
 ALIEN_SPEED = 0.05
 
@@ -73,6 +77,24 @@ BOLT_HEIGHT = 16
 BOLT_SPEED  = 10
 # the number of ALIEN STEPS (not frames) between bolts
 BOLT_RATE   = 5
+# the most bolts (player and alien) that can be on screen at once
+BOLT_LIMIT  = 64
+
+
+### SOUND CONSTANTS ###
+
+# the sound effects loaded when the game starts
+SOUND_EFFECTS = ('pew1.wav', 'pop2.wav')
+# the number of copies of each sound effect, so that they can overlap
+SOUND_VOICES  = 4
+
+
+### HUD CONSTANTS ###
+
+# the font of the messages on screen
+HUD_FONT      = 'Arcade.ttf'
+# the font size of the messages on screen
+HUD_FONT_SIZE = 50
 
 
 ### GAME CONSTANTS ###
@@ -90,6 +112,52 @@ STATE_CONTINUE = 4
 #: state when the game is complete (won or lost)
 STATE_COMPLETE = 5
 
+# the number of times per second the wave is updated, whatever the frame rate
+TICK_RATE = 60
+# the most updates of the wave in one frame; a frame that falls further behind
+# than this drops the rest (the game slows down rather than freezing)
+TICK_CATCHUP = 5
+
+
+### HEADLESS CONSTANTS ###
+
+# the number of seconds that pass each tick of a headless simulation
+HEADLESS_DT = 1 / TICK_RATE
+
+
+### REPLAY CONSTANTS ###
+
+# the folder where Invaders saves a replay of every wave, or None to save none
+REPLAY_DIR = None
+# the number of ticks between keyframes in a replay file (ten seconds)
+REPLAY_KEYFRAMES = 600
+# the number of bytes a replay reader takes from its file at once
+REPLAY_CHUNK = 65536
+
+
+### PROFILE CONSTANTS ###
+
+# the folder where Invaders saves a profile of every wave, or None to profile
+# nothing (a wave with no profiler does not time its phases)
+PROFILE_DIR = None
+# the number of ticks a profiler keeps (a minute at TICK_RATE)
+PROFILE_TICKS = 3600
+# the number of bins in the histogram of a profile
+PROFILE_BINS = 16
+
+
+### BATCH CONSTANTS ###
+
+# the number of ticks a RandomBot holds its keys before picking new ones
+BOT_HOLD = 10
+# the chance that a HunterBot waits a tick instead of moving or firing
+BOT_IDLE = 0.1
+# the most ticks a game in a batch simulation may run (ten minutes of play)
+BATCH_TICKS = 36000
+# the number of games each task of a batch simulation plays, so that workers
+# are not handed games one at a time
+BATCH_CHUNK = 8
+
 
 ### USE COMMAND LINE ARGUMENTS TO CHANGE NUMBER OF ALIENS IN A ROW
 """
@@ -0,0 +1,319 @@
+"""
+Environment module for Alien Invaders
+
+This module wraps a headless Wave as an environment for training agents, in
+the style of Gym: reset starts a new wave and returns what the agent sees,
+and step plays one tick with the keys the agent chose and returns what it
+sees next, its reward and whether the wave is over.
+
+An action is the bits of the keys held down for the tick, as in a replay
+(INPUT_LEFT, INPUT_RIGHT and INPUT_FIRE; see replay.py), so there are eight
+actions, 0 to 7. An observation is a dict of NumPy arrays:
+
+    alive   bool (rows, perrow), which aliens are alive, row 0 at the top
+    offset  float (2,), how far the formation has marched (see
+            Formation.getOffset)
+    ship    float (1,), the x coordinate of the ship (NaN if it is destroyed)
+    bolts   float (BOLT_LIMIT, 3), the x, y and velocity of each bolt on
+            screen, then rows of zeros (velocity 0 means no bolt)
+
+The reward of a tick is the number of aliens shot down, less one for each
+life lost. As in headless.run, a new ship is spawned as soon as one is
+destroyed, if lives remain.
+
+VectorEnv steps several waves in lockstep and returns the same arrays with
+one more axis in front, one entry per wave.
+"""
+from consts import *
+from headless import *
+from wave import *
+from replay import *
+import numpy
+
+
+def _observe(wave, alive, offset, ship, bolts):
+    """
+    Fills the given arrays with the observation of wave.
+
+    Parameter wave: the wave to observe
+    Precondition: wave is a headless Wave object
+
+    Parameter alive: the array for the alive flags
+    Precondition: alive is a bool array of the shape of the formation
+
+    Parameter offset: the array for the formation offset
+    Precondition: offset is a float array of shape (2,)
+
+    Parameter ship: the array for the ship position
+    Precondition: ship is a float array of shape (1,)
+
+    Parameter bolts: the array for the bolts
+    Precondition: bolts is a float array of shape (BOLT_LIMIT, 3)
+    """
+    formation = wave.getFormation()
+    alive[:] = formation.alive
+    offset[:] = formation.getOffset()
+    ship[0] = numpy.nan if wave.getShip() == None else wave.getShip().x
+    bolts[:] = 0
+    row = 0
+    for bolt in wave.getBolts():
+        bolts[row] = (bolt.x, bolt.y, bolt.getVelocity())
+        row += 1
+
+
+def _observation(count, rows, perrow):
+    """
+    Returns a new observation dict of arrays of zeros.
+
+    Parameter count: the number of waves observed, or None for one wave
+    without the extra axis
+    Precondition: count is an int > 0 or None
+
+    Parameter rows: the number of rows of aliens
+    Precondition: rows is an int > 0
+
+    Parameter perrow: the number of aliens in each row
+    Precondition: perrow is an int > 0
+    """
+    front = () if count == None else (count,)
+    return {'alive': numpy.zeros(front + (rows, perrow), dtype=bool),
+        'offset': numpy.zeros(front + (2,)),
+        'ship': numpy.zeros(front + (1,)),
+        'bolts': numpy.zeros(front + (BOLT_LIMIT, 3))}
+
+
+class InvadersEnv(object):
+    """
+    A class to play a single headless Wave one tick at a time.
+
+    The settings of the waves (the size of the formation, the alien speed
+    and the wave number) are fixed when the environment is made. Each reset
+    starts a new wave with them, in the same Wave object (see Wave.reset).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _rows, _perrow, _speed, _wavenumber: the settings of the waves
+    # Invariant: each is as given to the initializer
+    #
+    # Attribute _wave: the wave being played
+    # Invariant: _wave is a headless Wave, or None before the first reset
+    #
+    # Attribute _input: the keys given to _wave on each tick
+    # Invariant: _input is a ScriptedInput
+    #
+    # Attribute _ticks: the number of ticks played since the last reset
+    # Invariant: _ticks is an int >= 0
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getWave(self):
+        """
+        Getter for the wave being played (None before the first reset).
+        """
+        return self._wave
+
+
+    def __init__(self, rows=ALIEN_ROWS, perrow=ALIENS_IN_ROW,
+                 speed=ALIEN_SPEED, wavenumber=1):
+        """
+        Initializes an environment for waves with the given settings.
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter perrow: the number of aliens in each row
+        Precondition: perrow is an int > 0
+
+        Parameter speed: the seconds between alien steps in the first wave
+        Precondition: speed is a float > 0
+
+        Parameter wavenumber: the wave number of the waves
+        Precondition: wavenumber is an int >= 1
+        """
+        self._rows = rows
+        self._perrow = perrow
+        self._speed = speed
+        self._wavenumber = wavenumber
+        self._wave = None
+        self._input = ScriptedInput()
+        self._ticks = 0
+
+
+    def reset(self, seed=None):
+        """
+        Starts a new wave and returns its first observation.
+
+        Parameter seed: the seed of the wave (if None, one is picked at random)
+        Precondition: seed is an int or None
+        """
+        if self._wave == None:
+            self._wave = Wave(self._wavenumber, headless=True, seed=seed,
+                rows=self._rows, perrow=self._perrow, speed=self._speed)
+        else:
+            self._wave.reset(self._wavenumber, seed)
+        self._ticks = 0
+        return self.observe()
+
+
+    def step(self, action):
+        """
+        Plays one tick and returns (observation, reward, done, info).
+
+        done is True once the wave is won or lost, or the last life is gone;
+        step must not be called again until reset. info is a dict with the
+        ticks played, the aliens left and the lives left.
+
+        Parameter action: the bits of the keys to hold down this tick
+        Precondition: action is an int 0 <= action < 8
+        """
+        reward, done, info = self.advance(action)
+        return self.observe(), reward, done, info
+
+
+    def advance(self, action):
+        """
+        Plays one tick and returns (reward, done, info), as step does, but
+        without making an observation.
+
+        Parameter action: the bits of the keys to hold down this tick
+        Precondition: action is an int 0 <= action < 8
+        """
+        wave = self._wave
+        count = wave.getFormation().getCount()
+        lives = wave.getLives()
+        self._input.setKeys(decodeInput(int(action)))
+        wave.update(self._input, HEADLESS_DT)
+        if wave.getShip() == None and wave.getLives() > 0:
+            wave.spawnShip()
+        self._ticks += 1
+        left = wave.getFormation().getCount()
+        reward = (count - left) - (lives - wave.getLives())
+        done = (wave.getPlayerwin() or wave.getAlienwin() or
+            wave.getLives() == 0)
+        info = {'ticks': self._ticks, 'aliens': left, 'lives': wave.getLives()}
+        return reward, done, info
+
+
+    def observe(self):
+        """
+        Returns the observation of the wave as it is now.
+
+        The arrays are new, so they can be kept after the next step.
+        """
+        result = _observation(None, self._rows, self._perrow)
+        _observe(self._wave, result['alive'], result['offset'],
+            result['ship'], result['bolts'])
+        return result
+
+
+class VectorEnv(object):
+    """
+    A class to play several headless Waves in lockstep.
+
+    Every step plays one tick of every wave, each with its own action, and
+    returns the observations, rewards and done flags of all of them as arrays
+    with one entry per wave. A wave that is done is reset right away with a
+    new seed, and the observation returned for it is the first one of the
+    new wave (its info says it was reset).
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _envs: the environment of each wave
+    # Invariant: _envs is a nonempty list of InvadersEnv objects
+    #
+    # Attribute _seeds: the seed each wave was last reset with
+    # Invariant: _seeds is a list of ints, one per item of _envs
+    #
+    # Attribute _rows, _perrow: the size of the formations
+    # Invariant: each is as given to the initializer
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getCount(self):
+        """
+        Getter for the number of waves played at once.
+        """
+        return len(self._envs)
+
+
+    def __init__(self, count, rows=ALIEN_ROWS, perrow=ALIENS_IN_ROW,
+                 speed=ALIEN_SPEED, wavenumber=1):
+        """
+        Initializes an environment for count waves with the given settings.
+
+        Parameter count: the number of waves to play at once
+        Precondition: count is an int > 0
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter perrow: the number of aliens in each row
+        Precondition: perrow is an int > 0
+
+        Parameter speed: the seconds between alien steps in the first wave
+        Precondition: speed is a float > 0
+
+        Parameter wavenumber: the wave number of the waves
+        Precondition: wavenumber is an int >= 1
+        """
+        self._envs = [InvadersEnv(rows, perrow, speed, wavenumber)
+            for _ in range(count)]
+        self._seeds = [0] * count
+        self._rows = rows
+        self._perrow = perrow
+
+
+    def reset(self, seed=0):
+        """
+        Starts a new wave in every slot and returns their observations.
+
+        The waves get the seeds seed, seed + 1, and so on. When a wave is
+        done, the next one in its slot gets its seed plus the number of slots,
+        so no two waves share a seed.
+
+        Parameter seed: the seed of the first wave
+        Precondition: seed is an int
+        """
+        for number in range(len(self._envs)):
+            self._seeds[number] = seed + number
+            self._envs[number].reset(seed + number)
+        return self.observe()
+
+
+    def step(self, actions):
+        """
+        Plays one tick of every wave and returns (observations, rewards,
+        dones, infos).
+
+        rewards is a float array and dones a bool array, one entry per wave.
+        infos is a list of the info dict of each wave (see InvadersEnv.step),
+        with 'reset' set to True for the waves that were done and started
+        again.
+
+        Parameter actions: the bits of the keys to hold down in each wave
+        Precondition: actions is a sequence of ints 0 <= action < 8, one per
+        wave
+        """
+        count = len(self._envs)
+        rewards = numpy.zeros(count)
+        dones = numpy.zeros(count, dtype=bool)
+        infos = []
+        for number in range(count):
+            env = self._envs[number]
+            reward, done, info = env.advance(actions[number])
+            if done:
+                self._seeds[number] += count
+                env.reset(self._seeds[number])
+            info['reset'] = done
+            rewards[number] = reward
+            dones[number] = done
+            infos.append(info)
+        return self.observe(), rewards, dones, infos
+
+
+    def observe(self):
+        """
+        Returns the observations of every wave as it is now, stacked.
+        """
+        result = _observation(len(self._envs), self._rows, self._perrow)
+        for number in range(len(self._envs)):
+            _observe(self._envs[number].getWave(), result['alive'][number],
+                result['offset'][number], result['ship'][number],
+                result['bolts'][number])
+        return result
@@ -0,0 +1,402 @@
+"""
+Formation module for Alien Invaders
+
+This module contains the class Formation, which stores the aliens of a wave as
+a struct of arrays instead of a 2d list of Alien objects. The x and y position,
+the alive flag and the image of every alien each live in their own NumPy array
+with one cell per alien, row 0 at the top. Moving the whole formation is then a
+single vectorized add over the alive aliens instead of a Python loop over every
+cell.
+
+A Formation knows nothing about game2d. A Wave that draws reads these arrays
+straight into a single mesh (see FormationMesh in render.py), so there are no
+Alien objects to keep in step with them.
+"""
+from consts import *
+import numpy
+
+# PRIMARY RULE: Like models.py, this module may only access consts.py.
+
+
+class Formation(object):
+    """
+    A class to represent the grid of aliens in a single wave.
+
+    Each cell of the grid holds the alien at that row and column, or a dead
+    alien if its alive flag is False. Dead aliens are never moved or tested
+    for collisions, and they never come back (except with revive).
+    """
+    # INSTANCE ATTRIBUTES:
+    # Attribute x: the x coordinates of the alien centers
+    # Invariant: x is a float64 array of shape (rows, cols)
+    #
+    # Attribute y: the y coordinates of the alien centers
+    # Invariant: y is a float64 array of shape (rows, cols)
+    #
+    # Attribute alive: which aliens are still alive
+    # Invariant: alive is a bool array of shape (rows, cols)
+    #
+    # Attribute image: the index into ALIEN_IMAGES of each alien
+    # Invariant: image is an int8 array of shape (rows, cols)
+    #
+    # Attribute _rows: the number of rows of aliens
+    # Invariant: _rows is an int >= 1
+    #
+    # Attribute _cols: the number of aliens per row
+    # Invariant: _cols is an int >= 1
+    #
+    # Attribute _count: the number of living aliens
+    # Invariant: _count is an int, the number of True cells in alive
+    #
+    # Attribute _lowest: the lowest row with a living alien in each column
+    # Invariant: _lowest is a list of _cols ints, each the row index of the
+    # lowest living alien in that column or -1 if the column is empty
+    #
+    # Attribute _columns: the columns that still have a living alien
+    # Invariant: _columns is a list of column indices in increasing order
+    #
+    # Attribute _left: the leftmost column with a living alien
+    # Invariant: _left is an int 0 <= _left < _cols, or _cols if all are dead
+    #
+    # Attribute _right: the rightmost column with a living alien
+    # Invariant: _right is an int 0 <= _right < _cols, or -1 if all are dead
+    #
+    # Attribute _bottom: the lowest row with a living alien
+    # Invariant: _bottom is an int 0 <= _bottom < _rows, or -1 if all are dead
+    #
+    # Attribute _leftx: the x coordinate of the aliens in column _left
+    # Invariant: _leftx is an int or float
+    #
+    # Attribute _rightx: the x coordinate of the aliens in column _right
+    # Invariant: _rightx is an int or float
+    #
+    # Attribute _bottomy: the y coordinate of the aliens in row _bottom
+    # Invariant: _bottomy is an int or float
+    #
+    # Attribute _rowbytes: the alive flags of each row as bytes, for snapshot
+    # Invariant: _rowbytes is a list of _rows items, each the bytes of that
+    # row of alive or None if the row changed since they were taken
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getRows(self):
+        """
+        Getter for the number of rows of aliens.
+        """
+        return self._rows
+
+
+    def getCols(self):
+        """
+        Getter for the number of aliens per row.
+        """
+        return self._cols
+
+
+    def getCount(self):
+        """
+        Getter for the number of living aliens.
+        """
+        return self._count
+
+
+    def getColumns(self):
+        """
+        Getter for the columns that still have a living alien, left to right.
+
+        The list returned is the one kept by this formation, so it must not be
+        modified.
+        """
+        return self._columns
+
+
+    def getLowest(self, col):
+        """
+        Returns the row of the lowest living alien in column col, or -1 if
+        that column is empty.
+
+        Parameter col: the column to check
+        Precondition: col is an int 0 <= col < getCols()
+        """
+        return self._lowest[col]
+
+
+    def getLeft(self):
+        """
+        Getter for the x coordinate of the leftmost living alien.
+
+        This is None if every alien is dead.
+        """
+        return self._leftx if self._left <= self._right else None
+
+
+    def getRight(self):
+        """
+        Getter for the x coordinate of the rightmost living alien.
+
+        This is None if every alien is dead.
+        """
+        return self._rightx if self._left <= self._right else None
+
+
+    def getBottom(self):
+        """
+        Getter for the y coordinate of the lowest living alien.
+
+        This is None if every alien is dead.
+        """
+        return self._bottomy if self._bottom >= 0 else None
+
+
+    def getOffset(self):
+        """
+        Getter for how far the formation has marched from where it started.
+
+        The result is a tuple (dx, dy), with dy negative once it has stepped
+        down.
+        """
+        dx = self._leftx - self._left * (ALIEN_H_SEP + ALIEN_WIDTH) - \
+            (ALIEN_H_SEP + ALIEN_WIDTH//2)
+        dy = self._bottomy + self._bottom * (ALIEN_V_SEP + ALIEN_HEIGHT) - \
+            (GAME_HEIGHT - ALIEN_CEILING)
+        return (dx, dy)
+
+
+    def __init__(self, rows=ALIEN_ROWS, cols=ALIENS_IN_ROW):
+        """
+        Initializes a full formation of aliens at the top of the screen.
+
+        All the aliens in a row have the same image, and that image rotates
+        every two rows except for the first.
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int >= 1
+
+        Parameter cols: the number of aliens per row
+        Precondition: cols is an int >= 1
+        """
+        self._rows = rows
+        self._cols = cols
+        shape = (rows, cols)
+        self.x = numpy.empty(shape)
+        self.y = numpy.empty(shape)
+        self.alive = numpy.empty(shape, dtype=bool)
+        self.image = numpy.empty(shape, dtype=numpy.int8)
+        self.revive()
+
+
+    def getGrid(self):
+        """
+        Returns (xs, ys), where the aliens start out.
+
+        xs is a float array with the starting x coordinate of each column,
+        and ys one with the starting y coordinate of each row. Adding
+        getOffset to them gives where the living aliens are now.
+        """
+        xs = (ALIEN_H_SEP + ALIEN_WIDTH//2) + \
+            numpy.arange(self._cols)*(ALIEN_H_SEP+ALIEN_WIDTH)
+        ys = GAME_HEIGHT - ALIEN_CEILING - \
+            numpy.arange(self._rows)*(ALIEN_V_SEP+ALIEN_HEIGHT)
+        return xs.astype(float), ys.astype(float)
+
+
+    def revive(self):
+        """
+        Brings every alien back to life in its starting position.
+        """
+        rows = numpy.arange(self._rows)
+        xs, ys = self.getGrid()
+        self.x[:] = xs
+        self.y[:] = ys[:, None]
+        self.alive[:] = True
+        self._count = self._rows * self._cols
+        self._lowest = [self._rows - 1] * self._cols
+        self._columns = list(range(self._cols))
+        self.image[:] = numpy.array((0, 1, 1, 2, 2, 0))[rows % 6][:, None]
+        self._left = 0
+        self._right = self._cols - 1
+        self._bottom = self._rows - 1
+        self._leftx = float(self.x[0, self._left])
+        self._rightx = float(self.x[0, self._right])
+        self._bottomy = float(self.y[self._bottom, 0])
+        self._rowbytes = [None] * self._rows
+
+
+    def snapshot(self):
+        """
+        Returns the state of this formation as a tuple (dx, dy, rows).
+
+        dx and dy are how far the formation has marched from where it started,
+        and rows holds the alive flags of each row as a bytes object. The
+        aliens sit on a regular grid, so that is all there is to know.
+
+        The bytes of a row are kept until an alien in it dies, so snapshots
+        taken one after the other share the rows that did not change. None of
+        the result is ever modified.
+        """
+        rowbytes = self._rowbytes
+        for row in range(self._rows):
+            if rowbytes[row] == None:
+                rowbytes[row] = self.alive[row].tobytes()
+        dx, dy = self.getOffset()
+        return (dx, dy, tuple(rowbytes))
+
+
+    def restore(self, state):
+        """
+        Puts this formation back in the given state.
+
+        Every alien is placed on the grid, dead or not, and the bounds and
+        the lowest alien of each column are worked out again from the alive
+        flags.
+
+        Parameter state: the state to restore
+        Precondition: state was returned by snapshot on a formation with the
+        same number of rows and columns
+        """
+        dx, dy, rows = state
+        self.revive()
+        self.march(dx, dy)
+        self.alive[:] = numpy.frombuffer(b''.join(rows),
+            dtype=bool).reshape(self._rows, self._cols)
+        self._rowbytes = list(rows)
+        self._count = int(self.alive.sum())
+        self._columns = []
+        for col in range(self._cols):
+            lowest = self._rows - 1
+            while lowest >= 0 and not self.alive[lowest, col]:
+                lowest -= 1
+            self._lowest[col] = lowest
+            if lowest >= 0:
+                self._columns.append(col)
+        self._shrink()
+
+
+    def getBoxes(self):
+        """
+        Returns (rows, cols, boxes) for every living alien, for batchHits.
+
+        The living aliens are listed top row first, left to right. rows and
+        cols are int arrays with the cell of each one, and boxes is a float
+        array with one row (x, y, half width, half height) for each.
+        """
+        rows, cols = numpy.nonzero(self.alive)
+        boxes = numpy.empty((len(rows), 4))
+        boxes[:, 0] = self.x[rows, cols]
+        boxes[:, 1] = self.y[rows, cols]
+        boxes[:, 2] = ALIEN_WIDTH / 2
+        boxes[:, 3] = ALIEN_HEIGHT / 2
+        return rows, cols, boxes
+
+
+    def march(self, dx, dy):
+        """
+        Moves every living alien by dx horizontally and dy vertically.
+
+        Parameter dx: the number of pixels to move right (negative for left)
+        Precondition: dx is an int or float
+
+        Parameter dy: the number of pixels to move up (negative for down)
+        Precondition: dy is an int or float
+        """
+        if dx:
+            numpy.add(self.x, dx, out=self.x, where=self.alive)
+            self._leftx += dx
+            self._rightx += dx
+        if dy:
+            numpy.add(self.y, dy, out=self.y, where=self.alive)
+            self._bottomy += dy
+
+
+    def kill(self, row, col):
+        """
+        Marks the alien at row, col as dead (if it is not already).
+
+        The bounds of the formation only need to be looked at again if that
+        alien was in the leftmost or rightmost column, or in the lowest row.
+        Likewise, the lowest alien of a column only changes if it is the one
+        that died.
+
+        Parameter row: the row of the alien
+        Precondition: row is an int 0 <= row < getRows()
+
+        Parameter col: the column of the alien
+        Precondition: col is an int 0 <= col < getCols()
+        """
+        if not self.alive[row, col]:
+            return
+        self.alive[row, col] = False
+        self._rowbytes[row] = None
+        self._count -= 1
+        if row == self._lowest[col]:
+            lowest = row
+            while lowest >= 0 and not self.alive[lowest, col]:
+                lowest -= 1
+            self._lowest[col] = lowest
+            if lowest < 0:
+                self._columns.remove(col)
+        if col == self._left or col == self._right or row == self._bottom:
+            self._shrink()
+
+
+    def _shrink(self):
+        """
+        Moves _left, _right and _bottom inward past any columns or rows with
+        no living aliens, keeping _leftx, _rightx and _bottomy in step.
+
+        The aliens sit on a regular grid, so the position of a new edge is the
+        old one plus a whole number of grid steps.
+        """
+        alive = self.alive
+        while self._left <= self._right and not alive[:, self._left].any():
+            self._left += 1
+            self._leftx += ALIEN_H_SEP + ALIEN_WIDTH
+        while self._right >= self._left and not alive[:, self._right].any():
+            self._right -= 1
+            self._rightx -= ALIEN_H_SEP + ALIEN_WIDTH
+        while self._bottom >= 0 and not alive[self._bottom].any():
+            self._bottom -= 1
+            self._bottomy += ALIEN_V_SEP + ALIEN_HEIGHT
+
+
+    def hit(self, bolt):
+        """
+        Returns the (row, col) of a living alien that the player bolt collides
+        with, or None if there is no such alien.
+
+        This method returns None if bolt was not fired by the player. A bolt
+        collides with an alien if a corner of the bolt is inside the alien,
+        the same test as Alien.collides. If the bolt touches more than one
+        alien, the one in the highest row (then leftmost column) is returned.
+
+        The aliens sit on a regular grid, so each corner of the bolt can only
+        be inside the alien of the grid cell it falls in. That is at most two
+        columns and two rows to check, however large the formation is.
+
+        Parameter bolt: The laser bolt to check
+        Precondition: bolt is a Bolt or HeadlessBolt
+        """
+        if self._count == 0 or not bolt.isPlayerBolt():
+            return None
+        hstep = ALIEN_H_SEP + ALIEN_WIDTH
+        vstep = ALIEN_V_SEP + ALIEN_HEIGHT
+        x0 = self._leftx - self._left * hstep
+        y0 = self._bottomy + self._bottom * vstep
+        cols = []
+        for x in (bolt.x - BOLT_WIDTH // 2, bolt.x + BOLT_WIDTH // 2):
+            col = round((x - x0) / hstep)
+            if 0 <= col < self._cols and col not in cols and \
+            abs(x - (x0 + col * hstep)) <= ALIEN_WIDTH / 2:
+                cols.append(col)
+        if not cols:
+            return None
+        rows = []
+        for y in (bolt.y + BOLT_HEIGHT // 2, bolt.y - BOLT_HEIGHT // 2):
+            row = round((y0 - y) / vstep)
+            if 0 <= row < self._rows and row not in rows and \
+            abs(y - (y0 - row * vstep)) <= ALIEN_HEIGHT / 2:
+                rows.append(row)
+        for row in rows:
+            for col in sorted(cols):
+                if self.alive[row, col]:
+                    return (row, col)
+        return None
@@ -0,0 +1,248 @@
+"""
+Headless models module for Alien Invaders
+
+This module contains the models that Wave simulates the ship and the laser
+bolts with. They are plain Python objects with the same attributes as the
+game2d ones in models.py (x, y, width and height), but no image or rectangle
+to draw. A Wave that draws reads them into the batches of render.py: an
+AtlasSprite for the ship, a BoltMesh for the bolts and a FormationMesh for
+the aliens. Nothing in this module imports game2d (and with it Kivy), which
+means a headless Wave, which makes no game2d objects at all, runs on any
+machine with Python.
+
+The aliens are not here, as a Wave keeps them in a Formation (see
+formation.py). ScriptedInput plays the role of GInput, and the function run
+steps a Wave from a script of key presses.
+"""
+from consts import *
+from collision import *
+
+# PRIMARY RULE: Like models.py, this module may only access consts.py (and
+# collision.py, which follows the same rule).
+
+
+class ScriptedInput(object):
+    """
+    A class to stand in for GInput when there is no window to read keys from.
+
+    Only the parts of GInput that Wave uses are provided: the method
+    is_key_down and the attribute key_count. The keys held down are set from
+    a script (or a bot) once per tick with setKeys.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _keys: the keys held down this tick
+    # Invariant: _keys is a frozenset of key names (strings)
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    @property
+    def key_count(self):
+        """
+        The number of keys held down this tick.
+        """
+        return len(self._keys)
+
+
+    def setKeys(self, keys):
+        """
+        Setter for the keys held down this tick.
+
+        Parameter keys: the names of the keys held down
+        Precondition: keys is an iterable of strings, like 'left' or 'spacebar'
+        """
+        self._keys = frozenset(keys)
+
+
+    def __init__(self, keys=()):
+        """
+        Initializes an input with the given keys held down.
+
+        Parameter keys: the names of the keys held down
+        Precondition: keys is an iterable of strings, like 'left' or 'spacebar'
+        """
+        self.setKeys(keys)
+
+
+    def is_key_down(self, key):
+        """
+        Returns True if key is held down this tick.
+
+        Parameter key: the key to check
+        Precondition: key is a string
+        """
+        return key in self._keys
+
+
+class HeadlessShip(object):
+    """
+    A class to represent the game ship without an image.
+
+    The initializer takes the same arguments as Ship, and ignores them the
+    same way, so that Wave can build either one.
+    """
+    # INSTANCE ATTRIBUTES:
+    # Attribute x: the x coordinate of the center of the ship
+    # Invariant: x is an int or float
+    #
+    # Attribute y: the y coordinate of the center of the ship
+    # Invariant: y is an int or float
+    #
+    # Attribute width: the width of the ship in pixels
+    # Invariant: width is an int > 0
+    #
+    # Attribute height: the height of the ship in pixels
+    # Invariant: height is an int > 0
+
+    def __init__(self, x, y, width, height, source):
+        """
+        Initializes a headless ship at the bottom center of the screen.
+
+        Parameter x: the x coordinate of the center of the Ship
+        Precondition: x is a int 0<=x<=GAME_WIDTH
+
+        Parameter y: the y coordinate of the center of the Ship
+        Precondition: x is a int 0<=y<=GAME_HEIGHT
+
+        Parameter width: the width of the Ship object in pixels
+        Precondition: width is an int width>0
+
+        Parameter height: the height of the Ship object in pixels
+        Precondition: height is an int height>0
+
+        Parameter source: the source file for the image of the Ship (unused)
+        Precondition: source is a source file with extension .png
+        """
+        self.x = GAME_WIDTH // 2
+        self.y = SHIP_BOTTOM
+        self.width = SHIP_WIDTH
+        self.height = SHIP_HEIGHT
+
+
+    def collides(self, bolt):
+        """
+        Returns True if the alien bolt collides with this ship
+
+        This method returns False if bolt was fired by the player.
+
+        Parameter bolt: The laser bolt to check
+        Precondition: bolt is of class HeadlessBolt
+        """
+        return boltHitsShip(self, bolt)
+
+
+class HeadlessBolt(object):
+    """
+    A class representing a laser bolt without a rectangle to draw.
+    """
+    # INSTANCE ATTRIBUTES:
+    # Attribute x: the x coordinate of the center of the bolt
+    # Invariant: x is an int or float
+    #
+    # Attribute y: the y coordinate of the center of the bolt
+    # Invariant: y is an int or float
+    #
+    # Attribute width: the width of the bolt in pixels
+    # Invariant: width is an int > 0
+    #
+    # Attribute height: the height of the bolt in pixels
+    # Invariant: height is an int > 0
+    #
+    # Attribute _velocity: the velocity in y direction
+    # Invariant: _velocity is an int or float
+
+    def __init__(self, x, y, width, height, fillcolor, linewidth, velocity):
+        """
+        Initializes a headless bolt.
+
+        Parameter x: the x coordinate of the center of the Bolt
+        Precondition: x is a int 0<=x<=GAME_WIDTH - ALIEN_WIDTH // 2
+
+        Parameter y: the y coordinate of the center of the Bolt
+        Precondition: x is a int 0<=y<=GAME_HEIGHT
+
+        Parameter width: the width of the Bolt object in pixels
+        Precondition: width is an int width>0
+
+        Parameter height: the height of the Bolt object in pixels
+        Precondition: height is an int height>0
+
+        Parameter fillcolor: the color of the Bolt (unused)
+        Precondition: fillcolor is a string representing a color e.g. 'blue'
+
+        Parameter linewidth: the width of the outline of the Bolt (unused)
+        Precondition: linewidth is an int linewidth>0
+
+        Parameter velocity: the speed of the Bolt while it's on the screen
+        Precondition: velocity is an int or float
+        """
+        self.x = x
+        self.y = y
+        self.width = BOLT_WIDTH
+        self.height = BOLT_HEIGHT
+        self._velocity = velocity
+
+
+    def isPlayerBolt(self):
+        """
+        Returns True if self was fired from the Player, and returns False
+        if self was fired from an alien.
+        """
+        return self._velocity > 0
+
+
+    def getVelocity(self):
+        """
+        Getter for the number of pixels the bolt moves up each update
+        (negative if it moves down).
+        """
+        return self._velocity
+
+
+    def fire(self, x, y, velocity):
+        """
+        Fires this bolt again from (x, y) with the given velocity.
+
+        Parameter x: the x coordinate of the center of the Bolt
+        Precondition: x is a int 0<=x<=GAME_WIDTH - ALIEN_WIDTH // 2
+
+        Parameter y: the y coordinate of the center of the Bolt
+        Precondition: x is a int 0<=y<=GAME_HEIGHT
+
+        Parameter velocity: the speed of the Bolt while it's on the screen
+        Precondition: velocity is an int or float
+        """
+        self._velocity = velocity
+        self.x = x
+        self.y = y
+
+
+def run(wave, script, dt=HEADLESS_DT):
+    """
+    Steps wave once for each entry of script and returns the number of ticks.
+
+    This does for a headless Wave what Invaders does for a real one: when the
+    ship is destroyed and lives remain, a new ship is spawned right away
+    (there is no pause screen to wait on). The run stops early once the wave
+    is won or lost, or the last life is gone.
+
+    Parameter wave: the wave to step
+    Precondition: wave is a Wave object
+
+    Parameter script: the keys held down on each tick
+    Precondition: script is an iterable of iterables of key names
+
+    Parameter dt: the seconds that pass each tick
+    Precondition: dt is a float > 0
+    """
+    input = ScriptedInput()
+    ticks = 0
+    for keys in script:
+        if wave.getPlayerwin() or wave.getAlienwin():
+            break
+        if wave.getShip() is None:
+            if wave.getLives() == 0:
+                break
+            wave.spawnShip()
+        input.setKeys(keys)
+        wave.update(input, dt)
+        ticks += 1
+    return ticks
@@ -0,0 +1,62 @@
+"""
+HUD module for Alien Invaders
+
+This module contains the class Hud, which owns the messages Invaders shows on
+screen (how to start, the lives left when paused, and the end of a wave). Each
+message is a GLabel that is made the first time it is shown and kept after
+that. Its text is only set again, and so only laid out again, when it changes.
+Showing the same message frame after frame costs nothing but drawing it.
+"""
+from consts import *
+from game2d import *
+
+
+class Hud(object):
+    """
+    A class to make and keep the messages of the game.
+
+    Each message has a name, like 'paused', and at most one GLabel. Asking for
+    a message by name returns its GLabel with the given text, placed with its
+    bottom left corner at the given point.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _labels: the labels made so far
+    # Invariant: _labels is a dict mapping message names (strings) to GLabel
+    # objects in HUD_FONT at size HUD_FONT_SIZE
+
+    def __init__(self):
+        """
+        Initializes a HUD with no labels yet.
+        """
+        self._labels = {}
+
+
+    def getLabel(self, name, text, left, bottom):
+        """
+        Returns the label for the message name, showing text at (left, bottom).
+
+        The label is only made the first time name is asked for. After that,
+        it is only changed if text is different from what it shows.
+
+        Parameter name: the name of the message
+        Precondition: name is a string
+
+        Parameter text: the text of the message
+        Precondition: text is a string
+
+        Parameter left: the x coordinate of the left edge of the label
+        Precondition: left is an int or float
+
+        Parameter bottom: the y coordinate of the bottom edge of the label
+        Precondition: bottom is an int or float
+        """
+        label = self._labels.get(name)
+        if label == None:
+            label = GLabel(text = text, font_size = HUD_FONT_SIZE,
+            font_name = HUD_FONT, left = left, bottom = bottom)
+            self._labels[name] = label
+        elif label.text != text:
+            label.text = text
+            label.left = left
+            label.bottom = bottom
+        return label
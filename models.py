@@ -94,6 +94,10 @@ class Ship(GImage):
 
         Parameter bolt: The laser bolt to check
         Precondition: bolt is of class Bolt
+
+        Wave does not call this method: it uses the plain-number tests in
+        collision.py, which skip the game2d transforms. This is the reference
+        those tests must agree with.
         """
         boltlefttop = (bolt.x - BOLT_WIDTH // 2, bolt.y + BOLT_HEIGHT // 2)
         boltrighttop = (bolt.x + BOLT_WIDTH // 2, bolt.y + BOLT_HEIGHT // 2)
@@ -168,6 +172,11 @@ class Alien(GImage):
 
         Parameter bolt: The laser bolt to check
         Precondition: bolt is of class Bolt
+
+        Wave does not call this method: it asks its Formation (see
+        Formation.hit), which only tests the aliens in the grid cells the bolt
+        is in, with plain numbers that skip the game2d transforms. This is the
+        reference that test must agree with.
         """
         boltlefttop = (bolt.x - BOLT_WIDTH // 2, bolt.y + BOLT_HEIGHT // 2)
         boltrighttop = (bolt.x + BOLT_WIDTH // 2, bolt.y + BOLT_HEIGHT // 2)
@@ -0,0 +1,152 @@
+"""
+Bolt pool module for Alien Invaders
+
+This module contains the class BoltPool, which recycles laser bolts. A wave
+fires and drops bolts all the time. A pool keeps the bolts that have left play,
+and fires them again instead of building new ones. Once the pool has grown to
+the most bolts ever in play at once, a wave builds no more bolts at all. (The
+bolts are drawn all together by one mesh, which reads their positions each
+frame; see BoltMesh in render.py.)
+"""
+from consts import *
+
+# PRIMARY RULE: Like models.py, this module may only access consts.py.
+
+
+class BoltPool(object):
+    """
+    A class to hand out laser bolts, reusing the ones that have been released.
+
+    The pool works with any bolt class whose initializer takes the arguments
+    of Bolt and that has a method fire(x, y, velocity), like HeadlessBolt.
+    Its counters tell how well it is sized: hits are bolts reused, misses are
+    bolts that had to be built, and the high-water mark is the most bolts out
+    of the pool at once.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _boltclass: the class of the bolts in the pool
+    # Invariant: _boltclass is a class like HeadlessBolt
+    #
+    # Attribute _free: the released bolts ready to be fired again
+    # Invariant: _free is a list of _boltclass objects, possibly empty
+    #
+    # Attribute _active: the number of bolts acquired and not yet released
+    # Invariant: _active is an int >= 0
+    #
+    # Attribute _hits: the number of acquires served from _free
+    # Invariant: _hits is an int >= 0
+    #
+    # Attribute _misses: the number of acquires that built a new bolt
+    # Invariant: _misses is an int >= 0
+    #
+    # Attribute _highwater: the largest value _active has had
+    # Invariant: _highwater is an int >= _active
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getHits(self):
+        """
+        Getter for the number of bolts that were reused.
+        """
+        return self._hits
+
+
+    def getMisses(self):
+        """
+        Getter for the number of bolts that had to be built.
+        """
+        return self._misses
+
+
+    def getHighWater(self):
+        """
+        Getter for the most bolts that have been in play at once.
+        """
+        return self._highwater
+
+
+    def getActive(self):
+        """
+        Getter for the number of bolts in play right now.
+        """
+        return self._active
+
+
+    def getFree(self):
+        """
+        Getter for the number of bolts waiting in the pool.
+        """
+        return len(self._free)
+
+
+    def __init__(self, boltclass, size=0):
+        """
+        Initializes a pool of bolts of the given class.
+
+        Parameter boltclass: the class of the bolts to hand out
+        Precondition: boltclass is a class like HeadlessBolt
+
+        Parameter size: the number of bolts to build ahead of time
+        Precondition: size is an int >= 0
+        """
+        self._boltclass = boltclass
+        self._free = []
+        self._active = 0
+        self._hits = 0
+        self._misses = 0
+        self._highwater = 0
+        for _ in range(size):
+            self._free.append(self._build(0, 0, BOLT_SPEED))
+
+
+    def acquire(self, x, y, velocity):
+        """
+        Returns a bolt fired from (x, y) with the given velocity.
+
+        Parameter x: the x coordinate of the center of the bolt
+        Precondition: x is an int or float
+
+        Parameter y: the y coordinate of the center of the bolt
+        Precondition: y is an int or float
+
+        Parameter velocity: the speed of the bolt (negative for alien bolts)
+        Precondition: velocity is a nonzero int or float
+        """
+        if self._free:
+            bolt = self._free.pop()
+            bolt.fire(x, y, velocity)
+            self._hits += 1
+        else:
+            bolt = self._build(x, y, velocity)
+            self._misses += 1
+        self._active += 1
+        if self._active > self._highwater:
+            self._highwater = self._active
+        return bolt
+
+
+    def release(self, bolt):
+        """
+        Returns a bolt that has left play to the pool.
+
+        Parameter bolt: the bolt to release
+        Precondition: bolt came from acquire, and was not released since
+        """
+        self._active -= 1
+        self._free.append(bolt)
+
+
+    def _build(self, x, y, velocity):
+        """
+        Returns a new bolt fired from (x, y) with the given velocity.
+
+        Parameter x: the x coordinate of the center of the bolt
+        Precondition: x is an int or float
+
+        Parameter y: the y coordinate of the center of the bolt
+        Precondition: y is an int or float
+
+        Parameter velocity: the speed of the bolt (negative for alien bolts)
+        Precondition: velocity is a nonzero int or float
+        """
+        return self._boltclass(x=x, y=y, width=BOLT_WIDTH, height=BOLT_HEIGHT,
+            fillcolor='blue', linewidth=10, velocity=velocity)
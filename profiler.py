@@ -0,0 +1,210 @@
+"""
+Profiler module for Alien Invaders
+
+This module contains the class PhaseProfiler, which records how long each
+phase of Wave.update takes on every tick, to find the phases behind slow
+frames. A Wave only times its phases while it has a profiler (see
+Wave.setProfiler). Without one, update makes a single extra check per tick.
+
+Each tick is recorded with its start time, the seconds spent in each of the
+eight phases, and three counts taken that tick: the bolts on screen, the
+aliens alive and the collision tests made. The profiler keeps the last
+PROFILE_TICKS ticks in a ring buffer of NumPy arrays, so profiling a long
+session takes a fixed amount of memory and no allocation per tick.
+
+The ticks kept can be summed up as a histogram of each phase (histogram), or
+written as a Chrome trace (writeTrace), which chrome://tracing and Perfetto
+show as a timeline with one slice per phase and a graph of each count.
+"""
+from consts import *
+import json
+import numpy
+
+# PRIMARY RULE: Like models.py, this module may only access consts.py.
+
+# The phases of Wave.update, in the order they run (a profiled Wave runs the
+# methods of these names, in this order)
+PHASES = ('_animateShip', '_animateAliens', '_animateBolt', '_shootfromAliens',
+    '_handleShipBolts', '_handleAlienBolts', '_playerWins', '_alienWins')
+
+# The counts recorded with each tick
+COUNTS = ('bolts', 'aliens', 'tests')
+
+
+class PhaseProfiler(object):
+    """
+    A class to record the time spent in each phase of Wave.update.
+
+    Once more ticks have been recorded than the profiler has room for, each
+    new tick takes the place of the oldest one.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _starts: the perf_counter time at the start of each tick
+    # Invariant: _starts is a float array of shape (capacity,)
+    #
+    # Attribute _phases: the seconds spent in each phase of each tick
+    # Invariant: _phases is a float array of shape (capacity, len(PHASES))
+    #
+    # Attribute _counts: the counts of each tick, in the order of COUNTS
+    # Invariant: _counts is an int array of shape (capacity, len(COUNTS))
+    #
+    # Attribute _next: the row the next tick is recorded in
+    # Invariant: _next is an int 0 <= _next < capacity
+    #
+    # Attribute _size: the number of rows holding a tick
+    # Invariant: _size is an int 0 <= _size <= capacity
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSize(self):
+        """
+        Getter for the number of ticks kept.
+        """
+        return self._size
+
+
+    def getCapacity(self):
+        """
+        Getter for the most ticks that can be kept.
+        """
+        return len(self._starts)
+
+
+    def __init__(self, capacity=PROFILE_TICKS):
+        """
+        Initializes a profiler with room for the given number of ticks.
+
+        Parameter capacity: the most ticks to keep
+        Precondition: capacity is an int > 0
+        """
+        self._starts = numpy.zeros(capacity)
+        self._phases = numpy.zeros((capacity, len(PHASES)))
+        self._counts = numpy.zeros((capacity, len(COUNTS)), dtype=numpy.int64)
+        self._next = 0
+        self._size = 0
+
+
+    def record(self, start, seconds, bolts, aliens, tests):
+        """
+        Records one tick.
+
+        Parameter start: the perf_counter time at the start of the tick
+        Precondition: start is a float
+
+        Parameter seconds: the seconds spent in each phase of the tick
+        Precondition: seconds is a list of len(PHASES) floats
+
+        Parameter bolts: the number of bolts on screen
+        Precondition: bolts is an int >= 0
+
+        Parameter aliens: the number of aliens alive
+        Precondition: aliens is an int >= 0
+
+        Parameter tests: the number of collision tests made
+        Precondition: tests is an int >= 0
+        """
+        row = self._next
+        self._starts[row] = start
+        self._phases[row] = seconds
+        counts = self._counts[row]
+        counts[0] = bolts
+        counts[1] = aliens
+        counts[2] = tests
+        self._next = (row + 1) % len(self._starts)
+        if self._size < len(self._starts):
+            self._size += 1
+
+
+    def clear(self):
+        """
+        Forgets every tick recorded so far.
+        """
+        self._next = 0
+        self._size = 0
+
+
+    def getTicks(self):
+        """
+        Returns (starts, phases, counts) for the ticks kept, oldest first.
+
+        The arrays are copies, shaped like the ones kept but with one row per
+        tick kept.
+        """
+        order = self._order()
+        return self._starts[order], self._phases[order], self._counts[order]
+
+
+    def histogram(self, bins=PROFILE_BINS):
+        """
+        Returns a table of the time spent in each phase, as a string.
+
+        Each phase gets a line with its mean, median, 99th percentile and
+        worst time in microseconds, then the number of ticks that fell in each
+        of the bins. The bins double in width, starting below one
+        microsecond, so spikes stand out from the usual cost.
+
+        Parameter bins: the number of bins
+        Precondition: bins is an int > 0
+        """
+        starts, phases, counts = self.getTicks()
+        edges = [2.0 ** power for power in range(bins)]
+        lines = ['%d ticks; bins: < 1 us, then doubling, then >= %g us' %
+            (len(starts), edges[-2] if bins > 1 else 1)]
+        lines.append('%-18s %9s %9s %9s %9s  %s' % ('phase', 'mean', 'p50',
+            'p99', 'max', 'bins'))
+        for phase in range(len(PHASES)):
+            micros = phases[:, phase] * 1e6
+            if len(micros) == 0:
+                continue
+            found = numpy.bincount(numpy.searchsorted(edges[:-1], micros,
+                side='right'), minlength=bins)
+            lines.append('%-18s %9.2f %9.2f %9.2f %9.2f  %s' % (PHASES[phase],
+                micros.mean(), numpy.percentile(micros, 50),
+                numpy.percentile(micros, 99), micros.max(),
+                ' '.join(str(count) for count in found)))
+        for count in range(len(COUNTS)):
+            values = counts[:, count]
+            if len(values) == 0:
+                continue
+            lines.append('%-18s %9.2f %9.2f %9.2f %9d' % (COUNTS[count],
+                values.mean(), numpy.percentile(values, 50),
+                numpy.percentile(values, 99), values.max()))
+        return '\n'.join(lines)
+
+
+    def writeTrace(self, stream):
+        """
+        Writes the ticks kept to stream as a Chrome trace (JSON).
+
+        Every phase of every tick is a complete event, and the counts of each
+        tick are a counter event. Times are in microseconds from the start of
+        the oldest tick kept.
+
+        Parameter stream: the file to write to
+        Precondition: stream is a text file open for writing
+        """
+        starts, phases, counts = self.getTicks()
+        events = []
+        origin = starts[0] if len(starts) else 0.0
+        for tick in range(len(starts)):
+            stamp = (starts[tick] - origin) * 1e6
+            for phase in range(len(PHASES)):
+                seconds = float(phases[tick, phase])
+                events.append({'name': PHASES[phase], 'cat': 'update',
+                    'ph': 'X', 'ts': stamp, 'dur': seconds * 1e6, 'pid': 1,
+                    'tid': 1})
+                stamp += seconds * 1e6
+            events.append({'name': 'counts', 'ph': 'C',
+                'ts': (starts[tick] - origin) * 1e6, 'pid': 1,
+                'args': dict((COUNTS[count], int(counts[tick, count]))
+                    for count in range(len(COUNTS)))})
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, stream)
+
+
+    def _order(self):
+        """
+        Returns the rows holding a tick, oldest first, as an int array.
+        """
+        capacity = len(self._starts)
+        if self._size < capacity:
+            return numpy.arange(self._size)
+        return (numpy.arange(capacity) + self._next) % capacity
@@ -0,0 +1,377 @@
+"""
+Render module for Alien Invaders
+
+This module draws the ship, the aliens and the laser bolts of a Wave in
+batches. Drawing them as GImages and GRectangles issues a separate group of
+Kivy instructions for every alien and every bolt, every frame, so the cost of
+a frame grows with the formation and the bolts on screen. Here the aliens and
+the bolts are each a single Kivy Mesh instead.
+
+All of the images of the game are packed into one texture (a TextureAtlas), so
+one mesh can draw every alien, whatever its image. The atlas is loaded once,
+when the game starts (see loadAtlas), so that starting a wave reads and
+decodes no image files, however many aliens it has. The aliens sit on a
+regular grid that only moves as a whole, so their mesh is built once in the
+place they start, and a Translate moves it to where the formation has
+marched. The mesh is only changed when aliens die (or come back, after
+Wave.restore or Wave.reset).
+
+The bolts move every tick, so their mesh is rewritten, with NumPy, in one go
+whenever there are bolts to move. Nothing is rewritten while the wave stands
+still (when the game is paused, say): the same instructions are drawn again.
+
+Unlike the rest of the game, this module goes past game2d to Kivy itself,
+which game2d is built on. A GView draws any Kivy instruction it is given.
+"""
+from consts import *
+from kivy.graphics import (Fbo, ClearColor, ClearBuffers, Color, Rectangle,
+    Mesh, InstructionGroup, PushMatrix, PopMatrix, Translate)
+from kivy.core.image import Image as CoreImage
+import os
+import numpy
+
+# PRIMARY RULE: Like models.py, this module may only access consts.py.
+
+# The folder that game2d loads images from
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Images')
+
+# The order of the corners of a quad in its two triangles
+_QUAD = numpy.array((0, 1, 2, 2, 3, 0))
+
+# The atlas of GAME_IMAGES shared by everything drawn (see loadAtlas)
+_ATLAS = None
+
+
+def _quads(left, bottom, right, top, u0, v0, u1, v1):
+    """
+    Returns the vertices of rectangles, as a float32 array of shape (n, 16).
+
+    Each row is the four corners of one rectangle, counterclockwise from the
+    bottom left, each as x, y, u, v (the format Mesh uses by default).
+
+    Parameter left, bottom, right, top: the edges of each rectangle
+    Precondition: each is a float array of shape (n,), or a float
+
+    Parameter u0, v0, u1, v1: the texture coordinates of the edges
+    Precondition: each is a float array of shape (n,), or a float
+    """
+    n = numpy.broadcast(left, bottom, right, top, u0, v0, u1, v1).shape
+    vertices = numpy.empty(n + (4, 4), dtype=numpy.float32)
+    vertices[..., 0, :] = numpy.stack(numpy.broadcast_arrays(left, bottom,
+        u0, v0), axis=-1)
+    vertices[..., 1, :] = numpy.stack(numpy.broadcast_arrays(right, bottom,
+        u1, v0), axis=-1)
+    vertices[..., 2, :] = numpy.stack(numpy.broadcast_arrays(right, top,
+        u1, v1), axis=-1)
+    vertices[..., 3, :] = numpy.stack(numpy.broadcast_arrays(left, top,
+        u0, v1), axis=-1)
+    return vertices.reshape(n + (16,))
+
+
+def _indices(cells):
+    """
+    Returns the mesh indices that draw the quads of the given cells.
+
+    Parameter cells: the quads to draw, by their place in the vertices
+    Precondition: cells is an int array
+    """
+    return (cells[:, None] * 4 + _QUAD).ravel().tolist()
+
+
+def loadAtlas():
+    """
+    Returns the atlas of every image in GAME_IMAGES.
+
+    The images are only loaded the first time this is called. Every later
+    call returns the same atlas.
+    """
+    global _ATLAS
+    if _ATLAS == None:
+        _ATLAS = TextureAtlas(GAME_IMAGES)
+    return _ATLAS
+
+
+class TextureAtlas(object):
+    """
+    A class to hold several images in a single texture.
+
+    The images are loaded from IMAGE_DIR and drawn side by side into one
+    texture, a pixel apart. The part of the texture each image ended up in
+    is looked up by its file name.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _fbo: the frame buffer the images were drawn into
+    # Invariant: _fbo is a Fbo, kept so that its texture stays alive
+    #
+    # Attribute _regions: the texture coordinates of each image
+    # Invariant: _regions is a dict mapping file names to (u0, v0, u1, v1)
+    # tuples of floats 0..1, bottom left then top right
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getTexture(self):
+        """
+        Getter for the texture holding every image.
+        """
+        return self._fbo.texture
+
+
+    def getRegion(self, source):
+        """
+        Returns the texture coordinates (u0, v0, u1, v1) of the given image.
+
+        Parameter source: the file name of the image
+        Precondition: source is one of the images of this atlas
+        """
+        return self._regions[source]
+
+
+    def __init__(self, sources=GAME_IMAGES):
+        """
+        Initializes an atlas, loading and packing the given images.
+
+        Parameter sources: the file names of the images
+        Precondition: sources is a nonempty sequence of image files in
+        IMAGE_DIR
+        """
+        textures = [CoreImage(os.path.join(IMAGE_DIR, source)).texture
+            for source in sources]
+        width = sum(texture.width + 1 for texture in textures)
+        height = max(texture.height for texture in textures)
+        self._fbo = Fbo(size=(width, height))
+        self._regions = {}
+        left = 0
+        with self._fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Color(1, 1, 1, 1)
+            for source, texture in zip(sources, textures):
+                Rectangle(texture=texture, pos=(left, 0), size=texture.size)
+                self._regions[source] = (left / width, 0.0,
+                    (left + texture.width) / width, texture.height / height)
+                left += texture.width + 1
+        self._fbo.draw()
+
+
+class FormationMesh(object):
+    """
+    A class to draw every living alien of a Formation as a single mesh.
+
+    Call sync before each draw, to catch up with the aliens that died and
+    with how far the formation has marched.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _group: the instructions that draw the aliens
+    # Invariant: _group is an InstructionGroup holding _translate and _mesh
+    #
+    # Attribute _translate: moves the mesh to where the formation is now
+    # Invariant: _translate is a Translate by the formation's offset
+    #
+    # Attribute _mesh: a quad for every alien, where it started out
+    # Invariant: _mesh is a Mesh textured with the atlas, whose indices draw
+    # the quads of the aliens alive in _alive
+    #
+    # Attribute _alive: which aliens the mesh draws
+    # Invariant: _alive is a bool array of the shape of the formation
+    #
+    # Attribute _offset: the offset _translate moves the mesh by
+    # Invariant: _offset is a (float, float) tuple
+
+    def __init__(self, formation, atlas):
+        """
+        Initializes the mesh of the given formation.
+
+        Parameter formation: the aliens to draw
+        Precondition: formation is a Formation
+
+        Parameter atlas: the images of the aliens
+        Precondition: atlas is a TextureAtlas holding every image in
+        ALIEN_IMAGES
+        """
+        xs, ys = formation.getGrid()
+        x = numpy.broadcast_to(xs, formation.image.shape).ravel()
+        y = numpy.broadcast_to(ys[:, None], formation.image.shape).ravel()
+        regions = numpy.array([atlas.getRegion(source)
+            for source in ALIEN_IMAGES])[formation.image.ravel()]
+        vertices = _quads(x - ALIEN_WIDTH / 2, y - ALIEN_HEIGHT / 2,
+            x + ALIEN_WIDTH / 2, y + ALIEN_HEIGHT / 2, regions[:, 0],
+            regions[:, 1], regions[:, 2], regions[:, 3])
+        self._alive = numpy.zeros(formation.image.shape, dtype=bool)
+        self._offset = (0.0, 0.0)
+        self._translate = Translate(0, 0)
+        self._mesh = Mesh(vertices=vertices.ravel().tolist(), indices=[],
+            mode='triangles', texture=atlas.getTexture())
+        self._group = InstructionGroup()
+        self._group.add(PushMatrix())
+        self._group.add(Color(1, 1, 1, 1))
+        self._group.add(self._translate)
+        self._group.add(self._mesh)
+        self._group.add(PopMatrix())
+        self.sync(formation)
+
+
+    def sync(self, formation):
+        """
+        Brings the mesh up to date with the formation.
+
+        The indices of the mesh are only rebuilt if some alien died (or came
+        back) since the last sync, and the mesh is only moved if the
+        formation marched.
+
+        Parameter formation: the aliens to draw
+        Precondition: formation is the Formation this mesh was made for
+        """
+        if not numpy.array_equal(self._alive, formation.alive):
+            self._alive[:] = formation.alive
+            self._mesh.indices = _indices(numpy.flatnonzero(self._alive))
+        offset = formation.getOffset()
+        if offset != self._offset:
+            self._offset = offset
+            self._translate.xy = offset
+
+
+    def draw(self, view):
+        """
+        Draws the living aliens to the view.
+
+        Parameter view: the view window
+        Precondition: view is a GView object
+        """
+        view.draw(self._group)
+
+
+class AtlasSprite(object):
+    """
+    A class to draw one image of an atlas, which can be moved side to side.
+
+    It stands in for a GImage, without loading the image again.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _group: the instructions that draw the image
+    # Invariant: _group is an InstructionGroup holding _rectangle
+    #
+    # Attribute _rectangle: the image, in its part of the atlas
+    # Invariant: _rectangle is a Rectangle textured with the atlas, centered
+    # on _x
+    #
+    # Attribute _x: the horizontal center of the image
+    # Invariant: _x is a float
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getX(self):
+        """
+        Getter for the horizontal center of the image.
+        """
+        return self._x
+
+
+    def setX(self, x):
+        """
+        Setter for the horizontal center of the image.
+
+        Parameter x: the new center
+        Precondition: x is a number (int or float)
+        """
+        self._x = x
+        self._rectangle.pos = (x - self._rectangle.size[0] / 2,
+            self._rectangle.pos[1])
+
+
+    def __init__(self, atlas, source, x, y, width, height):
+        """
+        Initializes a sprite of the given image, centered at (x, y).
+
+        Parameter atlas: the images of the game
+        Precondition: atlas is a TextureAtlas holding source
+
+        Parameter source: the file name of the image
+        Precondition: source is a string
+
+        Parameter x, y: the center of the image
+        Precondition: each is a number (int or float)
+
+        Parameter width, height: the size of the image
+        Precondition: each is a number > 0
+        """
+        u0, v0, u1, v1 = atlas.getRegion(source)
+        self._x = x
+        self._rectangle = Rectangle(texture=atlas.getTexture(),
+            pos=(x - width / 2, y - height / 2), size=(width, height),
+            tex_coords=(u0, v0, u1, v0, u1, v1, u0, v1))
+        self._group = InstructionGroup()
+        self._group.add(Color(1, 1, 1, 1))
+        self._group.add(self._rectangle)
+
+
+    def draw(self, view):
+        """
+        Draws the image to the view.
+
+        Parameter view: the view window
+        Precondition: view is a GView object
+        """
+        view.draw(self._group)
+
+
+class BoltMesh(object):
+    """
+    A class to draw every laser bolt as a single mesh of blue rectangles.
+
+    Call sync before each draw, with the bolts on screen.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _group: the instructions that draw the bolts
+    # Invariant: _group is an InstructionGroup holding _mesh
+    #
+    # Attribute _mesh: a quad for every bolt
+    # Invariant: _mesh is a Mesh with _count quads
+    #
+    # Attribute _count: the number of quads in the indices of _mesh
+    # Invariant: _count is an int >= 0
+
+    def __init__(self):
+        """
+        Initializes a mesh with no bolts.
+        """
+        self._mesh = Mesh(vertices=[], indices=[], mode='triangles')
+        self._count = 0
+        self._group = InstructionGroup()
+        self._group.add(Color(0, 0, 1, 1))
+        self._group.add(self._mesh)
+
+
+    def sync(self, bolts, alpha=1.0):
+        """
+        Rewrites the mesh with the given bolts.
+
+        Each bolt is drawn alpha of the way from where it was before the last
+        update to where it is now (see Wave.draw). If there were no bolts and
+        there still are none, the mesh is left alone.
+
+        Parameter bolts: the bolts to draw
+        Precondition: bolts is a list of HeadlessBolt objects
+
+        Parameter alpha: how far the time of this frame is into the next tick
+        Precondition: alpha is a float 0 <= alpha <= 1
+        """
+        count = len(bolts)
+        if count == 0 and self._count == 0:
+            return
+        x = numpy.fromiter((bolt.x for bolt in bolts), float, count)
+        y = numpy.fromiter((bolt.y - bolt.getVelocity() * (1 - alpha)
+            for bolt in bolts), float, count)
+        vertices = _quads(x - BOLT_WIDTH / 2, y - BOLT_HEIGHT / 2,
+            x + BOLT_WIDTH / 2, y + BOLT_HEIGHT / 2, 0.0, 0.0, 1.0, 1.0)
+        self._mesh.vertices = vertices.ravel().tolist()
+        if count != self._count:
+            self._mesh.indices = _indices(numpy.arange(count))
+            self._count = count
+
+
+    def draw(self, view):
+        """
+        Draws the bolts to the view.
+
+        Parameter view: the view window
+        Precondition: view is a GView object
+        """
+        view.draw(self._group)
@@ -0,0 +1,737 @@
+"""
+Replay module for Alien Invaders
+
+This module records the input of a wave and plays it back. A Wave takes all of
+its random numbers from its own seeded generator, so a wave made with the same
+seed and wave number and given the same input on every tick plays out exactly
+the same way. A recording is therefore just the seed, the wave number and one
+small int per tick saying which keys were down.
+
+A recording made from the real game (see Invaders) can be played back by a
+headless Wave at full speed, to reproduce a bug or a slow frame.
+
+Recordings are saved with ReplayWriter and read back with ReplayReader. A
+replay file is a header, then the records, then an index:
+
+    header    'AIRP', version, seed, rows, aliens per row, alien speed,
+              wave number, tick rate, ticks between keyframes
+    records   one byte per tick (its bits, always < 16), or a keyframe: the
+              byte 0xFF, the tick it was taken before, the length of its
+              payload and the payload itself
+    index     the tick and file offset of every keyframe, then their count
+              and 'AIDX'
+
+All numbers are little-endian. An hour of play at TICK_RATE is about 216
+kilobytes of ticks. What a keyframe holds is up to whoever writes it; the
+reader just hands its payload back. An InputRecorder keeps a snapshot of the
+wave (see encodeSnapshot) every REPLAY_KEYFRAMES ticks, which seekReplay
+restores to reach any tick without playing the ones before it.
+
+The reader never loads the whole file: ticks streams the records in chunks of
+REPLAY_CHUNK bytes, and seek jumps straight to the last keyframe before a
+tick using the index. A file that was never closed (the game crashed, say)
+has no index, and is scanned for its keyframes instead.
+"""
+from consts import *
+from headless import *
+from wave import *
+import ast
+import bisect
+import itertools
+import struct
+import zlib
+
+
+# The bits of a recorded tick, one for each key (or pair of keys) that matters
+INPUT_LEFT  = 1
+INPUT_RIGHT = 2
+INPUT_FIRE  = 4
+INPUT_PAUSE = 8
+
+# The keys held down for each combination of bits, as given to ScriptedInput
+_KEYS = []
+for _bits in range(16):
+    _keys = []
+    if _bits & INPUT_LEFT:
+        _keys.append('left')
+    if _bits & INPUT_RIGHT:
+        _keys.append('right')
+    if _bits & INPUT_FIRE:
+        _keys.append('spacebar')
+    if _bits & INPUT_PAUSE:
+        _keys.append('p')
+    _KEYS.append(tuple(_keys))
+
+# The layout of a replay file (see the module docstring)
+_MAGIC = b'AIRP'
+_VERSION = 1
+_HEADER = struct.Struct('<4sBQBBdHHI')
+_KEYFRAME = 0xFF
+_KEYHEAD = struct.Struct('<II')
+_ENTRY = struct.Struct('<IQ')
+_FOOTER = struct.Struct('<I4s')
+_INDEX_MAGIC = b'AIDX'
+
+# The record of each tick, so that writing one does not build a new bytes
+_TICKS = [bytes((_bits,)) for _bits in range(16)]
+
+# Every byte that is the record of a tick, to find the ones that are not
+_BITS = bytes(range(16))
+
+
+def encodeInput(input):
+    """
+    Returns the bits for the keys that input has down.
+
+    Both 'spacebar' and 'up' fire, so either one sets INPUT_FIRE.
+
+    Parameter input: the input to read
+    Precondition: input is a GInput or ScriptedInput
+    """
+    bits = 0
+    if input.is_key_down('left'):
+        bits |= INPUT_LEFT
+    if input.is_key_down('right'):
+        bits |= INPUT_RIGHT
+    if input.is_key_down('spacebar') or input.is_key_down('up'):
+        bits |= INPUT_FIRE
+    if input.is_key_down('p'):
+        bits |= INPUT_PAUSE
+    return bits
+
+
+def encodeSnapshot(state):
+    """
+    Returns the bytes of a keyframe holding the given state of a wave.
+
+    The state is written with repr and compressed. Unlike a pickle, reading
+    it back (with decodeSnapshot) cannot run code from a replay file.
+
+    Parameter state: the state to encode
+    Precondition: state was returned by Wave.snapshot
+    """
+    return zlib.compress(repr(state).encode('ascii'))
+
+
+def decodeSnapshot(payload):
+    """
+    Returns the state of a wave held by a keyframe, for Wave.restore.
+
+    Parameter payload: the bytes of the keyframe
+    Precondition: payload was returned by encodeSnapshot
+    """
+    return ast.literal_eval(zlib.decompress(payload).decode('ascii'))
+
+
+def decodeInput(bits):
+    """
+    Returns the keys held down for the given bits.
+
+    Parameter bits: the bits of a recorded tick
+    Precondition: bits is an int 0 <= bits < 16
+    """
+    return _KEYS[bits]
+
+
+class InputRecorder(object):
+    """
+    A class to record the input of a single wave, one tick at a time.
+
+    Only ticks on which the wave is updated should be recorded. Ticks spent
+    paused do not change the wave, so a replay does not need them.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _seed: the seed of the wave being recorded
+    # Invariant: _seed is an int
+    #
+    # Attribute _wavenumber: the wave number of the wave being recorded
+    # Invariant: _wavenumber is an int >= 1
+    #
+    # Attribute _rows: the number of rows of aliens in the wave
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _perrow: the number of aliens in each row of the wave
+    # Invariant: _perrow is an int > 0
+    #
+    # Attribute _speed: the seconds between alien steps given to the wave
+    # Invariant: _speed is a float > 0
+    #
+    # Attribute _ticks: the bits of each tick recorded so far, in order
+    # Invariant: _ticks is a bytearray
+    #
+    # Attribute _keyframes: the keyframes recorded so far, in order
+    # Invariant: _keyframes is a list of (tick, payload) tuples, where tick is
+    # a multiple of REPLAY_KEYFRAMES and payload is from encodeSnapshot
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSeed(self):
+        """
+        Getter for the seed of the wave being recorded.
+        """
+        return self._seed
+
+
+    def getWavenumber(self):
+        """
+        Getter for the wave number of the wave being recorded.
+        """
+        return self._wavenumber
+
+
+    def getTicks(self):
+        """
+        Getter for the bits of every tick recorded so far.
+
+        The bytes returned are a copy, so later ticks do not change them.
+        """
+        return bytes(self._ticks)
+
+
+    def __init__(self, seed, wavenumber=1, rows=ALIEN_ROWS,
+                 perrow=ALIENS_IN_ROW, speed=ALIEN_SPEED):
+        """
+        Initializes a recorder for a wave with the given seed and wave number.
+
+        Parameter seed: the seed of the wave (see Wave.getSeed)
+        Precondition: seed is an int
+
+        Parameter wavenumber: the wave number of the wave
+        Precondition: wavenumber is an int >= 1
+
+        Parameter rows: the number of rows of aliens in the wave
+        Precondition: rows is an int > 0
+
+        Parameter perrow: the number of aliens in each row of the wave
+        Precondition: perrow is an int > 0
+
+        Parameter speed: the seconds between alien steps given to the wave
+        Precondition: speed is a float > 0
+        """
+        self._seed = seed
+        self._wavenumber = wavenumber
+        self._rows = rows
+        self._perrow = perrow
+        self._speed = speed
+        self._ticks = bytearray()
+        self._keyframes = []
+
+
+    def record(self, input, wave=None):
+        """
+        Records the keys that input has down for one tick.
+
+        Every REPLAY_KEYFRAMES ticks, a snapshot of wave is kept as well, so
+        that the replay can be started from it (see seekReplay).
+
+        Parameter input: the input given to the wave this tick
+        Precondition: input is a GInput or ScriptedInput
+
+        Parameter wave: the wave, before it is updated this tick (if None, no
+        keyframe is kept)
+        Precondition: wave is the Wave being recorded, or None
+        """
+        tick = len(self._ticks)
+        if wave != None and tick % REPLAY_KEYFRAMES == 0:
+            self._keyframes.append((tick, encodeSnapshot(wave.snapshot())))
+        self._ticks.append(encodeInput(input))
+
+
+    def save(self, stream):
+        """
+        Writes the recording so far to stream as a replay file.
+
+        Parameter stream: the file to write to
+        Precondition: stream is a binary file open for writing
+        """
+        writer = ReplayWriter(stream, self._seed, self._wavenumber, self._rows,
+            self._perrow, self._speed)
+        start = 0
+        for tick, payload in self._keyframes:
+            writer.writeTicks(self._ticks[start:tick])
+            writer.writeKeyframe(payload)
+            start = tick
+        writer.writeTicks(self._ticks[start:])
+        writer.close()
+
+
+class ReplayPlayer(object):
+    """
+    A class to play a recording back with a headless Wave.
+
+    As in headless.run, a new ship is spawned as soon as one is destroyed (if
+    lives remain), which is what the real game does once it is unpaused.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _seed: the seed of the recorded wave
+    # Invariant: _seed is an int
+    #
+    # Attribute _wavenumber: the wave number of the recorded wave
+    # Invariant: _wavenumber is an int >= 1
+    #
+    # Attribute _ticks: the bits of each recorded tick, in order
+    # Invariant: _ticks is an iterable of ints 0 <= bits < 16
+    #
+    # Attribute _rows: the number of rows of aliens in the recorded wave
+    # Invariant: _rows is an int > 0
+    #
+    # Attribute _perrow: the number of aliens in each row of the recorded wave
+    # Invariant: _perrow is an int > 0
+    #
+    # Attribute _speed: the seconds between alien steps in the recorded wave
+    # Invariant: _speed is a float > 0
+
+    def __init__(self, seed, ticks, wavenumber=1, rows=ALIEN_ROWS,
+                 perrow=ALIENS_IN_ROW, speed=ALIEN_SPEED):
+        """
+        Initializes a player for the given recording.
+
+        Parameter seed: the seed of the recorded wave
+        Precondition: seed is an int
+
+        Parameter ticks: the bits of each recorded tick
+        Precondition: ticks is an iterable of ints 0 <= bits < 16 (like the
+        bytes from InputRecorder.getTicks, or ReplayReader.ticks)
+
+        Parameter wavenumber: the wave number of the recorded wave
+        Precondition: wavenumber is an int >= 1
+
+        Parameter rows: the number of rows of aliens in the recorded wave
+        Precondition: rows is an int > 0
+
+        Parameter perrow: the number of aliens in each row of the recorded wave
+        Precondition: perrow is an int > 0
+
+        Parameter speed: the seconds between alien steps in the recorded wave
+        Precondition: speed is a float > 0
+        """
+        self._seed = seed
+        self._ticks = ticks
+        self._wavenumber = wavenumber
+        self._rows = rows
+        self._perrow = perrow
+        self._speed = speed
+
+
+    def play(self, dt=HEADLESS_DT):
+        """
+        Plays the recording on a new headless Wave and returns that wave.
+
+        The wave is made with the seed, wave number and aliens of the
+        recording.
+        Playing stops early if the wave is won or lost, or the last life is
+        gone.
+
+        Parameter dt: the seconds that pass each tick
+        Precondition: dt is a float > 0 (the dt of the recorded game)
+        """
+        wave = Wave(self._wavenumber, headless=True, seed=self._seed,
+            rows=self._rows, perrow=self._perrow, speed=self._speed)
+        run(wave, (_KEYS[bits] for bits in self._ticks), dt)
+        return wave
+
+
+class ReplayWriter(object):
+    """
+    A class to write a replay file, one record at a time.
+
+    The header is written as soon as the writer is made, and each tick or
+    keyframe as it is given, so a long session is never held in memory. The
+    index is only written by close. The writer does not close the stream.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _stream: the file being written
+    # Invariant: _stream is a binary file open for writing
+    #
+    # Attribute _interval: the number of ticks between keyframes
+    # Invariant: _interval is an int > 0
+    #
+    # Attribute _tick: the number of ticks written so far
+    # Invariant: _tick is an int >= 0
+    #
+    # Attribute _offset: the number of bytes written so far
+    # Invariant: _offset is an int >= the size of the header
+    #
+    # Attribute _index: the tick and offset of each keyframe written so far
+    # Invariant: _index is a list of (int, int) tuples in increasing order
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getTick(self):
+        """
+        Getter for the number of ticks written so far.
+        """
+        return self._tick
+
+
+    def getInterval(self):
+        """
+        Getter for the number of ticks between keyframes.
+        """
+        return self._interval
+
+
+    def __init__(self, stream, seed, wavenumber=1, rows=ALIEN_ROWS,
+                 perrow=ALIENS_IN_ROW, speed=ALIEN_SPEED, tickrate=TICK_RATE,
+                 keyframes=REPLAY_KEYFRAMES):
+        """
+        Initializes a writer, writing the header of the replay to stream.
+
+        Parameter stream: the file to write to
+        Precondition: stream is a binary file open for writing
+
+        Parameter seed: the seed of the recorded wave
+        Precondition: seed is an int 0 <= seed < 2 ** 64
+
+        Parameter wavenumber: the wave number of the recorded wave
+        Precondition: wavenumber is an int 1 <= wavenumber < 65536
+
+        Parameter rows: the number of rows of aliens in the recorded wave
+        Precondition: rows is an int 0 < rows < 256
+
+        Parameter perrow: the number of aliens in each row of the recorded wave
+        Precondition: perrow is an int 0 < perrow < 256
+
+        Parameter speed: the seconds between alien steps in the recorded wave
+        Precondition: speed is a float > 0
+
+        Parameter tickrate: the number of ticks per second
+        Precondition: tickrate is an int 0 < tickrate < 65536
+
+        Parameter keyframes: the number of ticks between keyframes
+        Precondition: keyframes is an int > 0
+        """
+        self._stream = stream
+        self._interval = keyframes
+        self._tick = 0
+        self._index = []
+        stream.write(_HEADER.pack(_MAGIC, _VERSION, seed, rows, perrow, speed,
+            wavenumber, tickrate, keyframes))
+        self._offset = _HEADER.size
+
+
+    def writeTick(self, bits):
+        """
+        Writes the record of one tick.
+
+        Parameter bits: the bits of the tick (see encodeInput)
+        Precondition: bits is an int 0 <= bits < 16
+        """
+        self._stream.write(_TICKS[bits])
+        self._tick += 1
+        self._offset += 1
+
+
+    def writeTicks(self, ticks):
+        """
+        Writes the records of several ticks at once.
+
+        Parameter ticks: the bits of each tick, in order
+        Precondition: ticks is a bytes or bytearray of values < 16
+        """
+        self._stream.write(ticks)
+        self._tick += len(ticks)
+        self._offset += len(ticks)
+
+
+    def writeKeyframe(self, payload):
+        """
+        Writes a keyframe, taken after every tick written so far.
+
+        Parameter payload: what the keyframe holds
+        Precondition: payload is a bytes object
+        """
+        self._index.append((self._tick, self._offset))
+        stream = self._stream
+        stream.write(bytes((_KEYFRAME,)))
+        stream.write(_KEYHEAD.pack(self._tick, len(payload)))
+        stream.write(payload)
+        self._offset += 1 + _KEYHEAD.size + len(payload)
+
+
+    def close(self):
+        """
+        Writes the index of the keyframes, which ends the replay file.
+
+        Nothing may be written after this. The stream is flushed, not closed.
+        """
+        stream = self._stream
+        for entry in self._index:
+            stream.write(_ENTRY.pack(*entry))
+        stream.write(_FOOTER.pack(len(self._index), _INDEX_MAGIC))
+        stream.flush()
+
+
+class ReplayReader(object):
+    """
+    A class to read a replay file without loading it whole.
+
+    The header is read when the reader is made. After that, ticks streams the
+    bits of the ticks from the current position, which is the start of the
+    replay until seek moves it to a keyframe.
+    """
+    # HIDDEN ATTRIBUTES:
+    # Attribute _stream: the file being read
+    # Invariant: _stream is a binary file open for reading, that can seek
+    #
+    # Attribute _seed, _wavenumber, _rows, _perrow, _speed, _tickrate,
+    # _interval: the fields of the header
+    # Invariant: each is as given to the ReplayWriter of the file
+    #
+    # Attribute _start: the offset of the first record
+    # Invariant: _start is the size of the header
+    #
+    # Attribute _end: the offset just past the last record
+    # Invariant: _end is an int >= _start
+    #
+    # Attribute _index: the tick and record offset of each keyframe
+    # Invariant: _index is a list of (int, int) tuples in increasing order, or
+    # None if the file has no index and has not been scanned yet
+    #
+    # Attribute _pos: the offset of the record ticks starts from
+    # Invariant: _pos is an int _start <= _pos <= _end
+
+    # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
+    def getSeed(self):
+        """
+        Getter for the seed of the recorded wave.
+        """
+        return self._seed
+
+
+    def getWavenumber(self):
+        """
+        Getter for the wave number of the recorded wave.
+        """
+        return self._wavenumber
+
+
+    def getRows(self):
+        """
+        Getter for the number of rows of aliens in the recorded wave.
+        """
+        return self._rows
+
+
+    def getPerrow(self):
+        """
+        Getter for the number of aliens in each row of the recorded wave.
+        """
+        return self._perrow
+
+
+    def getSpeed(self):
+        """
+        Getter for the seconds between alien steps in the recorded wave.
+        """
+        return self._speed
+
+
+    def getTickRate(self):
+        """
+        Getter for the number of ticks per second of the recording.
+        """
+        return self._tickrate
+
+
+    def getInterval(self):
+        """
+        Getter for the number of ticks between keyframes.
+        """
+        return self._interval
+
+
+    def getKeyframes(self):
+        """
+        Getter for the ticks at which keyframes were taken, in order.
+
+        If the file has no index, the first call scans the whole file.
+        """
+        if self._index == None:
+            self._index = self._scan()
+        return [tick for tick, offset in self._index]
+
+
+    def __init__(self, stream):
+        """
+        Initializes a reader, reading the header and index of the replay.
+
+        Parameter stream: the file to read
+        Precondition: stream is a binary file open for reading, that can seek
+        """
+        self._stream = stream
+        stream.seek(0)
+        header = stream.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError('not a replay file')
+        (magic, version, self._seed, self._rows, self._perrow, self._speed,
+            self._wavenumber, self._tickrate,
+            self._interval) = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('not a replay file (or a newer version)')
+        self._start = _HEADER.size
+        self._pos = self._start
+        self._end = stream.seek(0, 2)
+        self._index = None
+        if self._end - self._start >= _FOOTER.size:
+            stream.seek(self._end - _FOOTER.size)
+            count, magic = _FOOTER.unpack(stream.read(_FOOTER.size))
+            size = count * _ENTRY.size
+            if (magic == _INDEX_MAGIC and
+                self._end - self._start >= _FOOTER.size + size):
+                self._end -= _FOOTER.size + size
+                stream.seek(self._end)
+                data = stream.read(size)
+                self._index = [_ENTRY.unpack_from(data, i * _ENTRY.size)
+                    for i in range(count)]
+
+
+    def ticks(self):
+        """
+        Yields the bits of each tick, from the current position to the end.
+
+        Keyframes are skipped over. If the file was cut short, this stops at
+        the last whole record. If it was cut short inside its index, it stops
+        at the first byte of the index that is not a tick, so only a few bytes
+        of the index (read as ticks with no keys down) can come before that.
+        """
+        for run, keyframe in self._records(self._pos):
+            if run != None:
+                yield from run
+
+
+    def seek(self, tick):
+        """
+        Moves to the last keyframe at or before tick and returns it.
+
+        The result is a tuple (keyframe tick, payload). After this, ticks
+        starts with the tick just after the keyframe, so playing them from the
+        state in the payload reaches tick without playing the ones before the
+        keyframe. If there is no such keyframe, the reader moves back to the
+        start of the replay and returns (0, None).
+
+        Parameter tick: the tick to seek to
+        Precondition: tick is an int >= 0
+        """
+        self.getKeyframes()
+        ticks = [entry[0] for entry in self._index]
+        pos = bisect.bisect_right(ticks, tick) - 1
+        if pos < 0:
+            self._pos = self._start
+            return (0, None)
+        offset = self._index[pos][1]
+        stream = self._stream
+        stream.seek(offset + 1)
+        start, length = _KEYHEAD.unpack(stream.read(_KEYHEAD.size))
+        payload = stream.read(length)
+        self._pos = offset + 1 + _KEYHEAD.size + length
+        return (start, payload)
+
+
+    def _scan(self):
+        """
+        Returns the tick and record offset of every keyframe in the file.
+
+        This reads every record, and is only needed for a file with no index.
+        """
+        index = []
+        for run, keyframe in self._records(self._start):
+            if keyframe != None:
+                index.append(keyframe)
+        return index
+
+
+    def _records(self, pos):
+        """
+        Yields the records from offset pos to the end, a chunk at a time.
+
+        Each item is a tuple (run, keyframe). For a run of ticks, run is the
+        bytes of their bits and keyframe is None. For a keyframe, run is None
+        and keyframe is its tick and record offset. This stops at the first
+        byte that is neither a tick nor a keyframe, which is where the index
+        of a file that has lost its footer begins (or soon after).
+
+        Parameter pos: the offset of the first record to read
+        Precondition: pos is the offset of a record, or _end
+        """
+        stream = self._stream
+        end = self._end
+        # A chunk must at least hold a keyframe header
+        size = max(REPLAY_CHUNK, 1 + _KEYHEAD.size)
+        while pos < end:
+            stream.seek(pos)
+            chunk = stream.read(min(size, end - pos))
+            if not chunk:
+                return
+            i = 0
+            while i < len(chunk):
+                mark = chunk.find(_KEYFRAME, i)
+                if mark == -1:
+                    mark = len(chunk)
+                if mark > i:
+                    run = chunk[i:mark]
+                    junk = run.translate(None, _BITS)
+                    if junk:
+                        # Not a replay record, so the records are over
+                        stop = run.index(junk[0])
+                        if stop > 0:
+                            yield (run[:stop], None)
+                        return
+                    yield (run, None)
+                if mark == len(chunk):
+                    i = mark
+                elif mark + 1 + _KEYHEAD.size > len(chunk):
+                    # The keyframe header is cut off by the end of the chunk,
+                    # or by the end of the file if it starts the chunk
+                    if mark == 0:
+                        return
+                    i = mark
+                    break
+                else:
+                    tick, length = _KEYHEAD.unpack_from(chunk, mark + 1)
+                    if pos + mark + 1 + _KEYHEAD.size + length > end:
+                        return
+                    yield (None, (tick, pos + mark))
+                    i = mark + 1 + _KEYHEAD.size + length
+            pos += i
+
+
+def playReplay(stream):
+    """
+    Plays the replay file in stream on a new headless Wave and returns it.
+
+    The ticks are streamed from the file as they are played.
+
+    Parameter stream: the replay file to play
+    Precondition: stream is a binary file open for reading, that can seek
+    """
+    reader = ReplayReader(stream)
+    player = ReplayPlayer(reader.getSeed(), reader.ticks(),
+        reader.getWavenumber(), reader.getRows(), reader.getPerrow(),
+        reader.getSpeed())
+    return player.play(1 / reader.getTickRate())
+
+
+def seekReplay(stream, tick):
+    """
+    Returns a new headless Wave in the state of the replay in stream after tick
+    ticks.
+
+    The wave is restored from the last keyframe at or before tick, and only
+    the ticks after that keyframe are played. Playing stops early if the wave
+    is won or lost, or the last life is gone.
+
+    Parameter stream: the replay file to play
+    Precondition: stream is a binary file open for reading, that can seek
+
+    Parameter tick: the number of ticks to play
+    Precondition: tick is an int >= 0
+    """
+    reader = ReplayReader(stream)
+    start, payload = reader.seek(tick)
+    wave = Wave(reader.getWavenumber(), headless=True, seed=reader.getSeed(),
+        rows=reader.getRows(), perrow=reader.getPerrow(),
+        speed=reader.getSpeed())
+    if payload != None:
+        wave.restore(decodeSnapshot(payload))
+    ticks = itertools.islice(reader.ticks(), tick - start)
+    run(wave, (_KEYS[bits] for bits in ticks), 1 / reader.getTickRate())
+    return wave
@@ -0,0 +1,66 @@
+"""
+Tests for the collision module of Alien Invaders
+
+Run them from the folder with the game modules:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consts import *
+from collision import *
+from formation import *
+import numpy
+
+
+def _boxes(*rows):
+    """
+    Returns the given boxes as an array for batchHits.
+
+    Parameter rows: the boxes, each as (x, y, half width, half height)
+    Precondition: rows is a sequence of 4-tuples of numbers
+    """
+    return numpy.array(rows, dtype=float).reshape(-1, 4)
+
+
+def test_batch_hits_no_targets():
+    """
+    Checks that batchHits hits nothing when there is nothing to hit.
+    """
+    hitters, targets = batchHits(_boxes((10, 10, 2, 8)), _boxes())
+    assert len(hitters) == 0 and len(targets) == 0
+    hitters, targets = batchHits(_boxes(), _boxes((10, 10, 16, 16)))
+    assert len(hitters) == 0 and len(targets) == 0
+
+
+def test_batch_hits_shared_target():
+    """
+    Checks that a target hit by several bolts goes to the earliest one, and
+    that the others hit nothing.
+    """
+    bolts = _boxes((100, 100, 2, 8), (0, 0, 2, 8), (100, 95, 2, 8),
+        (300, 300, 2, 8), (100, 105, 2, 8))
+    targets = _boxes((300, 300, 16, 16), (100, 100, 16, 16))
+    hitters, targets = batchHits(bolts, targets)
+    assert hitters.tolist() == [0, 3]
+    assert targets.tolist() == [1, 0]
+
+
+def test_batch_hits_formation():
+    """
+    Checks batchHits against the boxes of a formation, with one alien dead.
+    """
+    formation = Formation(2, 3)
+    formation.kill(0, 1)
+    rows, cols, boxes = formation.getBoxes()
+    x = float(formation.x[1, 2])
+    y = float(formation.y[1, 2])
+    bolts = _boxes((float(formation.x[0, 1]), float(formation.y[0, 1]),
+        BOLT_WIDTH / 2, BOLT_HEIGHT / 2), (x, y, BOLT_WIDTH / 2,
+        BOLT_HEIGHT / 2))
+    hitters, targets = batchHits(bolts, boxes)
+    assert hitters.tolist() == [1]
+    assert (rows[targets[0]], cols[targets[0]]) == (1, 2)
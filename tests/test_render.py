@@ -0,0 +1,161 @@
+"""
+Smoke test for the render module of Alien Invaders
+
+render.py draws with Kivy itself, which needs an OpenGL context. The drawing
+is done in a separate Python process (this file, run as a script), with SDL
+asked for an offscreen window, so that a machine without Kivy or without
+OpenGL skips the test instead of crashing pytest. The process draws a
+formation, the ship and a bolt into a Fbo of the size of the game, with
+images made on the spot, and checks the colors of the pixels.
+
+Run it from the folder with the game modules:
+
+    python -m pytest tests
+"""
+import os
+import sys
+import zlib
+import struct
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The solid color of each image made for the test
+COLORS = {'ship.png': (0, 255, 0), 'alien1.png': (255, 0, 0),
+    'alien2.png': (0, 0, 255), 'alien3.png': (255, 255, 0)}
+
+# What the drawing process prints once it has a window
+READY = 'window ready'
+
+
+def _png(path, size, color):
+    """
+    Writes a PNG file of a single color.
+
+    Parameter path: the file to write
+    Precondition: path is a string
+
+    Parameter size: the width and height of the image
+    Precondition: size is an int > 0
+
+    Parameter color: the red, green and blue of the image
+    Precondition: color is a tuple of three ints 0..255
+    """
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+            struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+    row = b'\0' + bytes(color + (255,)) * size
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 6,
+            0, 0, 0)))
+        file.write(chunk(b'IDAT', zlib.compress(row * size)))
+        file.write(chunk(b'IEND', b''))
+
+
+def _draw(folder):
+    """
+    Draws a wave with render.py and checks the pixels (the child process).
+
+    Parameter folder: the folder with the images
+    Precondition: folder holds an image for each key of COLORS
+    """
+    os.environ.setdefault('KIVY_NO_ARGS', '1')
+    from kivy.core.window import Window
+    from kivy.graphics import Fbo, ClearColor, ClearBuffers
+    print(READY, flush=True)
+    import numpy
+    import render
+    from consts import GAME_WIDTH, GAME_HEIGHT, SHIP_IMAGE, SHIP_BOTTOM
+    from consts import SHIP_WIDTH, SHIP_HEIGHT, BOLT_WIDTH, BOLT_HEIGHT
+    from consts import BOLT_SPEED, ALIEN_IMAGES
+    from formation import Formation
+    from headless import HeadlessBolt
+    render.IMAGE_DIR = folder
+
+    class View(object):
+        # Stands in for a GView, drawing into a Fbo that can be read back
+        def __init__(self):
+            self.fbo = Fbo(size=(GAME_WIDTH, GAME_HEIGHT))
+
+        def draw(self, instruction):
+            self.fbo.add(instruction)
+
+        def frame(self, *things):
+            self.fbo.clear()
+            with self.fbo:
+                ClearColor(0, 0, 0, 1)
+                ClearBuffers()
+            for thing in things:
+                thing.draw(self)
+            self.fbo.draw()
+            return numpy.frombuffer(self.fbo.pixels, numpy.uint8).reshape(
+                GAME_HEIGHT, GAME_WIDTH, 4)
+
+    def at(pixels, x, y):
+        return tuple(int(value) for value in pixels[int(y), int(x), :3])
+
+    atlas = render.loadAtlas()
+    assert render.loadAtlas() is atlas
+    formation = Formation(3, 4)
+    mesh = render.FormationMesh(formation, atlas)
+    ship = render.AtlasSprite(atlas, SHIP_IMAGE, 200, SHIP_BOTTOM,
+        SHIP_WIDTH, SHIP_HEIGHT)
+    bolts = render.BoltMesh()
+    bolt = HeadlessBolt(x=400, y=300, width=BOLT_WIDTH, height=BOLT_HEIGHT,
+        fillcolor='blue', linewidth=1, velocity=BOLT_SPEED)
+    bolts.sync([bolt], 1.0)
+    view = View()
+    pixels = view.frame(mesh, ship, bolts)
+    for row, col in ((0, 0), (1, 2), (2, 3)):
+        image = ALIEN_IMAGES[formation.image[row, col]]
+        assert at(pixels, formation.x[row, col],
+            formation.y[row, col]) == COLORS[image]
+    assert at(pixels, 200, SHIP_BOTTOM) == COLORS[SHIP_IMAGE]
+    assert at(pixels, 400, 300) == (0, 0, 255)
+
+    # Far enough that no alien covers where the top row was
+    x, y = float(formation.x[0, 0]), float(formation.y[0, 0])
+    oldx = float(formation.x[0, 1])
+    formation.kill(0, 0)
+    formation.march(100, -100)
+    mesh.sync(formation)
+    ship.setX(300)
+    bolts.sync([], 1.0)
+    pixels = view.frame(mesh, ship, bolts)
+    assert at(pixels, x + 100, y - 100) == (0, 0, 0)
+    assert at(pixels, oldx, y) == (0, 0, 0)
+    image = ALIEN_IMAGES[formation.image[0, 1]]
+    assert at(pixels, formation.x[0, 1],
+        formation.y[0, 1]) == COLORS[image]
+    assert at(pixels, 200, SHIP_BOTTOM) == (0, 0, 0)
+    assert at(pixels, 300, SHIP_BOTTOM) == COLORS[SHIP_IMAGE]
+    assert at(pixels, 400, 300) == (0, 0, 0)
+    print('drawn', flush=True)
+
+
+def test_render_draws():
+    """
+    Draws the aliens, the ship and a bolt in a child process, and checks that
+    they land where they should, in the colors of their images.
+    """
+    import pytest
+    pytest.importorskip('kivy')
+    with tempfile.TemporaryDirectory() as folder:
+        for name, color in COLORS.items():
+            _png(os.path.join(folder, name), 33, color)
+        env = dict(os.environ, SDL_VIDEODRIVER='offscreen', KIVY_NO_ARGS='1',
+            KIVY_NO_CONSOLELOG='1')
+        result = subprocess.run([sys.executable, os.path.abspath(__file__),
+            folder], cwd=ROOT, env=env, capture_output=True, text=True,
+            timeout=120)
+    if READY not in result.stdout:
+        pytest.skip('no OpenGL window: ' + result.stderr[-200:])
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert 'drawn' in result.stdout
+
+
+if __name__ == '__main__':
+    _draw(sys.argv[1])
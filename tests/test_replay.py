@@ -0,0 +1,128 @@
+"""
+Tests for the replay module of Alien Invaders
+
+The replays are written to and read from memory, and played on headless
+waves. Run them from the folder with the game modules:
+
+    python -m pytest tests
+"""
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consts import *
+from headless import *
+from replay import *
+from wave import *
+
+# The number of ticks in the recording, enough for a few keyframes
+TICKS = 2 * REPLAY_KEYFRAMES + 300
+
+
+def _script(tick):
+    """
+    Returns the keys held down on the given tick of the recording.
+
+    The ship sweeps from side to side and fires every other second.
+
+    Parameter tick: the number of the tick
+    Precondition: tick is an int >= 0
+    """
+    keys = ['left'] if (tick // 90) % 2 == 0 else ['right']
+    if (tick // TICK_RATE) % 2 == 0:
+        keys.append('spacebar')
+    return tuple(keys)
+
+
+def _record():
+    """
+    Returns the bytes of a replay file and the wave it was recorded from.
+
+    The wave is played the way headless.run plays it, with its input and a
+    keyframe recorded before every update, as Invaders does.
+    """
+    wave = Wave(headless=True, seed=7, rows=3, perrow=6, speed=0.5)
+    recorder = InputRecorder(wave.getSeed(), 1, 3, 6, 0.5)
+    input = ScriptedInput()
+    for tick in range(TICKS):
+        assert not wave.getPlayerwin() and not wave.getAlienwin()
+        if wave.getShip() == None:
+            assert wave.getLives() > 0
+            wave.spawnShip()
+        input.setKeys(_script(tick))
+        recorder.record(input, wave)
+        wave.update(input, HEADLESS_DT)
+    stream = io.BytesIO()
+    recorder.save(stream)
+    return stream.getvalue(), wave
+
+
+def _play(data, ticks):
+    """
+    Returns a new headless Wave that has played the first ticks of a replay.
+
+    Parameter data: the replay file
+    Precondition: data is the bytes of a replay file
+
+    Parameter ticks: the number of ticks to play
+    Precondition: ticks is an int >= 0
+    """
+    reader = ReplayReader(io.BytesIO(data))
+    bits = bytes(reader.ticks())[:ticks]
+    player = ReplayPlayer(reader.getSeed(), bits, reader.getWavenumber(),
+        reader.getRows(), reader.getPerrow(), reader.getSpeed())
+    return player.play(1 / reader.getTickRate())
+
+
+def test_round_trip():
+    """
+    Checks that a saved replay reads back as recorded, and plays back to the
+    state of the recorded wave.
+    """
+    data, wave = _record()
+    reader = ReplayReader(io.BytesIO(data))
+    assert (reader.getSeed(), reader.getWavenumber()) == (7, 1)
+    assert (reader.getRows(), reader.getPerrow()) == (3, 6)
+    assert reader.getSpeed() == 0.5
+    assert reader.getTickRate() == TICK_RATE
+    assert reader.getKeyframes() == [0, REPLAY_KEYFRAMES, 2 * REPLAY_KEYFRAMES]
+    ticks = bytes(reader.ticks())
+    assert len(ticks) == TICKS
+    for tick in range(TICKS):
+        assert decodeInput(ticks[tick]) == _script(tick)
+    assert playReplay(io.BytesIO(data)).snapshot() == wave.snapshot()
+
+
+def test_seek_matches_play():
+    """
+    Checks that seekReplay reaches the same state as playing every tick up to
+    the one sought, on and around each keyframe.
+    """
+    data, wave = _record()
+    for tick in (0, 1, 250, REPLAY_KEYFRAMES - 1, REPLAY_KEYFRAMES,
+                 REPLAY_KEYFRAMES + 1, 2 * REPLAY_KEYFRAMES + 123, TICKS):
+        sought = seekReplay(io.BytesIO(data), tick)
+        assert sought.snapshot() == _play(data, tick).snapshot()
+    assert seekReplay(io.BytesIO(data), TICKS).snapshot() == wave.snapshot()
+
+
+def test_truncated_index():
+    """
+    Checks that a file cut off inside its index still reads back as the ticks
+    recorded, with nothing past them but a few ticks with no keys down.
+    """
+    data, wave = _record()
+    ticks = bytes(ReplayReader(io.BytesIO(data)).ticks())
+    keyframes = ReplayReader(io.BytesIO(data)).getKeyframes()
+    # The index is 12 bytes a keyframe, then the 8 byte footer
+    for cut in (1, 8, 9, 20, 12 * len(keyframes)):
+        reader = ReplayReader(io.BytesIO(data[:-cut]))
+        assert reader.getKeyframes() == keyframes
+        found = bytes(reader.ticks())
+        assert found[:TICKS] == ticks
+        assert found[TICKS:] == bytes(len(found) - TICKS)
+        assert len(found) - TICKS < 12
+        assert seekReplay(io.BytesIO(data[:-cut]),
+            TICKS).snapshot() == wave.snapshot()
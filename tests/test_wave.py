@@ -0,0 +1,231 @@
+"""
+Tests for the Wave subcontroller of Alien Invaders
+
+The waves are headless and driven with a ScriptedInput, so these run without
+game2d or a window. Run them from the folder with the game modules:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consts import *
+from collision import *
+from formation import *
+from headless import *
+from profiler import *
+from wave import *
+
+
+def _script(tick):
+    """
+    Returns the keys held down on the given tick of a long soak.
+
+    The ship sweeps from side to side and fires whenever it can, so that there
+    are bolts of both sides on screen all the time.
+
+    Parameter tick: the number of the tick
+    Precondition: tick is an int >= 0
+    """
+    if (tick // 120) % 2 == 0:
+        return ('left', 'spacebar')
+    return ('right', 'spacebar')
+
+
+def _checkBolts(wave):
+    """
+    Asserts that the bolts of wave are bounded and all come from its pool.
+
+    Parameter wave: the wave to check
+    Precondition: wave is a headless Wave
+    """
+    bolts = wave.getBolts()
+    assert len(bolts) <= BOLT_LIMIT
+    assert wave.getPool().getActive() == len(bolts)
+
+
+def test_bolts_stay_bounded():
+    """
+    Plays 100k ticks and checks the bolts after every one of them.
+
+    A wave that is over is started again, and a destroyed ship is replaced,
+    so the whole run has bolts flying.
+    """
+    wave = Wave(headless=True, seed=10, rows=5, perrow=11, speed=0.05)
+    input = ScriptedInput()
+    seed = 10
+    for tick in range(100000):
+        input.setKeys(_script(tick))
+        wave.update(input, HEADLESS_DT)
+        _checkBolts(wave)
+        if wave.getPlayerwin() or wave.getAlienwin() or wave.getLives() == 0:
+            seed += 1
+            wave.reset(1 + seed % 3, seed)
+            _checkBolts(wave)
+        elif wave.getShip() == None:
+            wave.spawnShip()
+
+
+def test_bolts_stop_at_limit():
+    """
+    Checks that no bolt is fired, by either side, once BOLT_LIMIT are on
+    screen.
+    """
+    wave = Wave(headless=True, seed=3, rows=2, perrow=3)
+    input = ScriptedInput(('spacebar',))
+    for number in range(BOLT_LIMIT):
+        wave.getBolts().append(wave.getPool().acquire(GAME_WIDTH / 2,
+            GAME_HEIGHT / 2, -BOLT_SPEED))
+    for tick in range(10):
+        wave.update(input, HEADLESS_DT)
+        _checkBolts(wave)
+        for bolt in wave.getBolts():
+            assert not bolt.isPlayerBolt()
+
+
+def _straddle(wave):
+    """
+    Returns a player bolt, from the pool of wave, that touches the aliens in
+    rows 0 and 1 of column 0 at once.
+
+    The bolt is as tall as the gap between the rows, so centered in the gap
+    it touches the alien above and the alien below.
+
+    Parameter wave: the wave to fire the bolt in
+    Precondition: wave is a headless Wave with at least two rows
+    """
+    formation = wave.getFormation()
+    x = float(formation.x[0, 0])
+    y = float(formation.y[0, 0] + formation.y[1, 0]) / 2
+    bolt = wave.getPool().acquire(x, y, BOLT_SPEED)
+    for row in (0, 1):
+        assert overlaps(bolt.x, bolt.y, BOLT_WIDTH / 2, BOLT_HEIGHT / 2,
+            float(formation.x[row, 0]), float(formation.y[row, 0]),
+            ALIEN_WIDTH / 2, ALIEN_HEIGHT / 2)
+    return bolt
+
+
+def test_bolt_kills_one_alien():
+    """
+    Checks that a bolt touching two aliens kills one, and goes back to the
+    pool once.
+    """
+    wave = Wave(headless=True, seed=11, rows=3, perrow=4)
+    formation = wave.getFormation()
+    bolt = _straddle(wave)
+    wave.getBolts().append(bolt)
+    count = formation.getCount()
+    free = wave.getPool().getFree()
+    wave._handleShipBolts()
+    assert formation.getCount() == count - 1
+    assert formation.alive[0, 0] != formation.alive[1, 0]
+    assert bolt not in wave.getBolts()
+    assert wave.getPool().getActive() == 0
+    assert wave.getPool().getFree() == free + 1
+
+
+def _step(wave, input, tick):
+    """
+    Steps wave once with the keys of the given tick, then spawns a new ship if
+    the last one was destroyed and lives remain.
+
+    Parameter wave: the wave to step
+    Precondition: wave is a headless Wave
+
+    Parameter input: the input to give the wave
+    Precondition: input is a ScriptedInput
+
+    Parameter tick: the number of the tick
+    Precondition: tick is an int >= 0
+    """
+    input.setKeys(_script(tick))
+    wave.update(input, HEADLESS_DT)
+    if wave.getShip() == None and wave.getLives() > 0:
+        wave.spawnShip()
+
+
+def test_snapshot_round_trip():
+    """
+    Checks that restoring a snapshot, on the same wave or a new one, gives a
+    wave with that same snapshot.
+    """
+    wave = Wave(headless=True, seed=5, rows=4, perrow=6, speed=0.5)
+    input = ScriptedInput()
+    for tick in range(400):
+        _step(wave, input, tick)
+    state = wave.snapshot()
+    assert len(state[3]) > 0
+    assert wave.getFormation().getCount() < 4 * 6
+    other = Wave(headless=True, seed=9, rows=4, perrow=6)
+    other.restore(state)
+    assert other.snapshot() == state
+    for tick in range(400, 500):
+        _step(wave, input, tick)
+    assert wave.snapshot() != state
+    wave.restore(state)
+    assert wave.snapshot() == state
+    _checkBolts(wave)
+
+
+def test_restore_plays_the_same():
+    """
+    Checks that a wave restored from a snapshot plays the next 500 ticks
+    exactly as the wave the snapshot was taken from.
+    """
+    wave = Wave(headless=True, seed=5, rows=4, perrow=6, speed=0.5)
+    input = ScriptedInput()
+    for tick in range(300):
+        _step(wave, input, tick)
+    other = Wave(headless=True, seed=5, rows=4, perrow=6, speed=0.5)
+    other.restore(wave.snapshot())
+    for tick in range(300, 800):
+        _step(wave, input, tick)
+        _step(other, input, tick)
+        assert other.snapshot() == wave.snapshot()
+
+
+def test_snapshot_shares_rows():
+    """
+    Checks that snapshots share the bytes of the rows that did not change,
+    and that a later kill does not change an earlier snapshot.
+    """
+    formation = Formation(3, 4)
+    first = formation.snapshot()
+    formation.kill(1, 2)
+    second = formation.snapshot()
+    assert first[2][0] is second[2][0]
+    assert first[2][2] is second[2][2]
+    assert first[2][1] is not second[2][1]
+    assert first[2][1] == bytes((1, 1, 1, 1))
+    assert second[2][1] == bytes((1, 1, 0, 1))
+    formation.restore(first)
+    assert formation.getCount() == 3 * 4
+    assert formation.snapshot()[2][1] is first[2][1]
+    wave = Wave(headless=True, seed=5, rows=4, perrow=6)
+    rows = wave.snapshot()[0][2]
+    wave.update(ScriptedInput(), HEADLESS_DT)
+    for row, again in zip(rows, wave.snapshot()[0][2]):
+        assert row is again
+
+
+def test_profiled_update_matches():
+    """
+    Checks that a wave with a profiler plays out the same as one without,
+    and that every phase of every tick is recorded.
+    """
+    plain = Wave(headless=True, seed=21, rows=3, perrow=5)
+    timed = Wave(headless=True, seed=21, rows=3, perrow=5)
+    profiler = PhaseProfiler(capacity=1000)
+    timed.setProfiler(profiler)
+    input = ScriptedInput()
+    for tick in range(600):
+        input.setKeys(_script(tick))
+        for wave in (plain, timed):
+            wave.update(input, HEADLESS_DT)
+            if wave.getShip() == None and wave.getLives() > 0:
+                wave.spawnShip()
+    assert plain.snapshot() == timed.snapshot()
+    starts, phases, counts = profiler.getTicks()
+    assert phases.shape == (600, len(PHASES))
@@ -3,10 +3,11 @@ Subcontroller module for Alien Invaders
 
 This module contains the subcontroller to manage a single level or wave in
 the Alien Invaders game.  Instances of Wave represent a single wave. Whenever
-you move to a new level, you are expected to make a new instance of the class.
+you move to a new level, the same instance is started over with reset.
 
 The subcontroller Wave manages the ship, the aliens and any laser bolts on
-screen. These are model objects.  Their classes are defined in models.py.
+screen. These are model objects.  Their classes are defined in headless.py
+and formation.py, and they are drawn with the batches in render.py.
 
 Most of your work on this assignment will be in either this module or
 models.py. Whether a helper method belongs in this module or models.py is
@@ -16,10 +17,25 @@ answer.
 # Brandon Nathasingh bn243 Taerim Oem te89
 # 12/14/19
 """
-from game2d import *
 from consts import *
-from models import *
+from headless import *
+from formation import *
+from collision import *
+from pool import *
+from audio import *
+from profiler import *
+import time
 import random
+try:
+    from game2d import *
+except ImportError:
+    # game2d needs Kivy, and is only used to draw. A headless Wave never
+    # builds a GObject, so it still runs on a machine without either.
+    pass
+else:
+    # With game2d there, render must load too: an error in it is not
+    # swallowed here, to turn up later as a missing name in Wave
+    from render import *
 
 # PRIMARY RULE: Wave can only access attributes in models.py via getters/setters
 # Wave is NOT allowed to access anything in app.py (Subcontrollers are not
@@ -34,8 +50,8 @@ class Wave(object):
     on screen. It animates the laser bolts, removing any aliens as necessary.
     It also marches the aliens back and forth across the screen until they are
     all destroyed or they reach the defense line (at which point the player
-    loses). When the wave is complete, you  should create a NEW instance of
-    Wave (in Invaders) if you want to make a new wave of aliens.
+    loses). When the wave is complete, Invaders calls reset to make a new
+    wave of aliens in the same instance.
 
     If you want to pause the game, tell this controller to draw, but do not
     update.  See subcontrollers.py from Lecture 24 for an example.  This
@@ -54,14 +70,18 @@ class Wave(object):
     # Attribute _ship: the player ship to control
     # Invariant: _ship is a Ship object or None
     #
-    # Attribute _aliens: the 2d list of aliens in the wave
-    # Invariant: _aliens is a rectangular 2d list containing Alien objects or None
+    # Attribute _formation: the positions, alive flags and images of the aliens
+    # Invariant: _formation is a Formation object
+    #
+    # Attribute _alienmesh: the mesh that draws the aliens of _formation
+    # Invariant: _alienmesh is a FormationMesh, or None if the wave is
+    # headless
     #
     # Attribute _bolts: the laser bolts currently on screen
     # Invariant: _bolts is a list of Bolt objects, possibly empty
     #
     # Attribute _dline: the defensive line being protected
-    # Invariant : _dline is a GPath object
+    # Invariant : _dline is a GPath object, or None if the wave is headless
     #
     # Attribute _lives: the number of lives left
     # Invariant: _lives is an int >= 0
@@ -98,6 +118,53 @@ class Wave(object):
     #                       player is on
     #Invariant _wavenumber is an int >= 1
 
+    #Attribute _headless: whether the wave runs without game2d (no window,
+    #                     textures or sounds)
+    #Invariant _headless is a boolean
+
+    #Attribute _shipsprite: the image drawn for _ship
+    #Invariant _shipsprite is an AtlasSprite, or None if _headless is True
+
+    #Attribute _boltmesh: the mesh that draws the bolts in _bolts
+    #Invariant _boltmesh is a BoltMesh, or None if _headless is True
+
+    #Attribute _shipprev: the x coordinate of _ship before the last update
+    #Invariant _shipprev is an int or float, or None if there was no ship
+
+    #Attribute _audio: the sound effects played by the wave
+    #Invariant _audio is an AudioBank, disabled if _headless is True
+
+    #Attribute _seed: the seed of _random
+    #Invariant _seed is an int
+
+    #Attribute _random: the random numbers of this wave (and only this wave),
+    #                   so that a wave with the same seed and input plays out
+    #                   the same way every time
+    #Invariant _random is a random.Random, seeded by _reseed from _seed and
+    #          _shots
+
+    #Attribute _shots: the number of times the aliens have taken a shot (or
+    #                  skipped one at BOLT_LIMIT)
+    #Invariant _shots is an int >= 0
+
+    #Attribute _pool: the pool that hands out (and takes back) laser bolts
+    #Invariant _pool is a BoltPool of HeadlessBolt. Every bolt in _bolts
+    #          came from _pool.
+
+    #Attribute _version: the number of times the wave has changed (by an
+    #                    update, a restore or a new ship)
+    #Invariant _version is an int >= 0
+
+    #Attribute _drawn: what draw last drew, as the _version and alpha it drew
+    #Invariant _drawn is a (int, float) tuple, or None before the first draw
+
+    #Attribute _profiler: where update records the time of each phase
+    #Invariant _profiler is a PhaseProfiler, or None to not time them
+
+    #Attribute _speed: the seconds between alien steps in the first wave
+    #                  (later waves divide it by _wavenumber)
+    #Invariant _speed is a float > 0
+
     # GETTERS AND SETTERS (ONLY ADD IF YOU NEED THEM)
     def getShip(self):
         """
@@ -111,6 +178,7 @@ class Wave(object):
         Setter for ship
         """
         self._ship = ship
+        self._version += 1
 
 
     def getLives(self):
@@ -148,26 +216,194 @@ class Wave(object):
         self._wavenumber = number
 
 
+    def getBolts(self):
+        """
+        Getter for the laser bolts on screen (to read, not to change).
+        """
+        return self._bolts
+
+
+    def getFormation(self):
+        """
+        Getter for the formation of aliens (to read, not to change).
+        """
+        return self._formation
+
+
+    def getPool(self):
+        """
+        Getter for the pool of laser bolts (to read its counters).
+        """
+        return self._pool
+
+
+    def getSeed(self):
+        """
+        Getter for the seed of the random numbers of this wave.
+        """
+        return self._seed
+
+
+    def getRows(self):
+        """
+        Getter for the number of rows of aliens this wave started with.
+        """
+        return self._formation.getRows()
+
+
+    def getPerrow(self):
+        """
+        Getter for the number of aliens in each row this wave started with.
+        """
+        return self._formation.getCols()
+
+
+    def getSpeed(self):
+        """
+        Getter for the seconds between alien steps in the first wave.
+        """
+        return self._speed
+
+
+    def getProfiler(self):
+        """
+        Getter for the profiler of update (None if it is not profiled).
+        """
+        return self._profiler
+
+
+    def setProfiler(self, profiler):
+        """
+        Setter for the profiler of update.
+
+        Parameter profiler: where to record the time of each phase (None to
+        stop timing them)
+        Precondition: profiler is a PhaseProfiler or None
+        """
+        self._profiler = profiler
+
+
+    def isHeadless(self):
+        """
+        Getter that returns if this wave runs without game2d.
+        """
+        return self._headless
+
+
     # INITIALIZER (standard form) TO CREATE SHIP AND ALIENS
-    def __init__(self, wavenumber = 1):
+    def __init__(self, wavenumber = 1, headless = False, audio = None,
+                 seed = None, rows = ALIEN_ROWS, perrow = ALIENS_IN_ROW,
+                 speed = ALIEN_SPEED, atlas = None):
         """
         Initializes the application, creating new attributes.
-        """
+
+        The ship, aliens and bolts are simulated with the plain models in
+        headless.py and formation.py. A wave that is not headless also makes
+        the objects to draw them (meshes for the aliens and the bolts, see
+        render.py), which draw moves into place. A headless wave makes none
+        of those and plays no sounds, so it can be stepped with a
+        ScriptedInput without a window.
+
+        All of that is only made here. The wave itself is set up by reset,
+        which can be called again to start the next wave in the same objects.
+
+        Parameter wavenumber: the wave number of the wave
+        Precondition: wavenumber is an int >= 1
+
+        Parameter headless: whether to run without game2d
+        Precondition: headless is a boolean
+
+        Parameter audio: the sound effects to play, loaded ahead of time (if
+        None, a headless wave plays nothing and any other wave loads its own)
+        Precondition: audio is an AudioBank or None
+
+        Parameter seed: the seed for the random numbers of the wave (if None,
+        one is picked at random)
+        Precondition: seed is an int or None
+
+        Parameter rows: the number of rows of aliens
+        Precondition: rows is an int > 0
+
+        Parameter perrow: the number of aliens in each row
+        Precondition: perrow is an int > 0
+
+        Parameter speed: the seconds between alien steps in the first wave
+        Precondition: speed is a float > 0
+
+        Parameter atlas: the images of the game, loaded ahead of time (if
+        None, a wave that is not headless uses the one of loadAtlas)
+        Precondition: atlas is a TextureAtlas of GAME_IMAGES or None
+        """
+        self._random = random.Random()
+        self._headless = headless
+        if audio == None:
+            audio = AudioBank(enabled = not headless)
+        self._audio = audio
+        self._pool = BoltPool(HeadlessBolt)
+        self._speed = speed
+        self._version = 0
+        self._drawn = None
+        self._profiler = None
+        self._formation = Formation(rows, perrow)
+        self._ship = None
+        self._bolts = []
+        if headless:
+            self._alienmesh = None
+            self._shipsprite = None
+            self._boltmesh = None
+            self._dline = None
+        else:
+            if atlas == None:
+                atlas = loadAtlas()
+            self._alienmesh = FormationMesh(self._formation, atlas)
+            self._shipsprite = AtlasSprite(atlas, SHIP_IMAGE,
+            GAME_WIDTH // 2, SHIP_BOTTOM, SHIP_WIDTH, SHIP_HEIGHT)
+            self._boltmesh = BoltMesh()
+            self._dline = GPath(points=[0,DEFENSE_LINE,GAME_WIDTH,
+            DEFENSE_LINE], linewidth=2, linecolor = 'blue')
+        self.reset(wavenumber, seed)
+
+
+    def reset(self, wavenumber = 1, seed = None):
+        """
+        Starts this wave over as the given wave number.
+
+        Every alien comes back to life where the formation starts, a new ship
+        is placed and the bolts on screen go back to the pool. Nothing else is
+        made again: the formation arrays, the bolt pool and the meshes, ship
+        sprite and defense line that draw them are all kept, so starting a
+        wave this way does not stall the frame it happens in. The size of the
+        formation and the alien speed stay as they were given to the
+        initializer, and so does the profiler.
+
+        Parameter wavenumber: the wave number of the wave
+        Precondition: wavenumber is an int >= 1
+
+        Parameter seed: the seed for the random numbers of the wave (if None,
+        one is picked at random)
+        Precondition: seed is an int or None
+        """
+        if seed == None:
+            seed = random.randrange(2 ** 32)
+        self._seed = seed
+        self._version += 1
         self._time=0
         self._last=0
-        self._aliens = self._fillAliens()
+        self._formation.revive()
         self._direction = 'right'
-        self._ship = Ship(x = GAME_WIDTH // 2, y = SHIP_BOTTOM,
-        width = SHIP_WIDTH, height = SHIP_HEIGHT, source = 'ship.png')
-        self._dline = GPath(points=[0,DEFENSE_LINE,GAME_WIDTH,DEFENSE_LINE],
-        linewidth=2, linecolor = 'blue')
+        self.spawnShip()
+        self._shipprev = self._ship.x
+        for bolt in self._bolts:
+            self._pool.release(bolt)
         self._bolts = []
-        self._interval = random.randrange(1, BOLT_RATE)
+        self._shots = 0
+        self._reseed()
+        self._interval = self._random.randrange(1, BOLT_RATE)
         self._steps=0
         self._lives = SHIP_LIVES
         self._playerwin = False
         self._alienwin = False
-        self._wavenumber = 1
+        self._wavenumber = wavenumber
 
 
     # UPDATE METHOD TO MOVE THE SHIP, ALIENS, AND LASER BOLTS
@@ -177,9 +413,22 @@ class Wave(object):
 
         Determines whether the player won or lost the Wave.
 
-        Parameter dt: The time since the last animation frame.
+        The ship and bolts move a fixed distance on every call, so a call
+        should be made for each tick of a fixed length dt (see TICK_RATE),
+        not once per animation frame.
+
+        The work is done in phases, the methods named in PHASES (see
+        profiler.py), called in that order. If the wave has a profiler, the
+        time of each phase is recorded in it (see _updateProfiled).
+
+        Parameter dt: The time since the last update (the length of a tick).
         Precondition: dt is a float.
         """
+        self._version += 1
+        self._shipprev = None if self._ship == None else self._ship.x
+        if self._profiler != None:
+            self._updateProfiled(input, dt)
+            return
         self._animateShip(input)
         self._animateAliens(dt)
         self._animateBolt(input)
@@ -190,47 +439,194 @@ class Wave(object):
         self._alienWins()
 
 
+    def _updateProfiled(self, input, dt):
+        """
+        Does what update does, recording the time of each phase in _profiler.
+
+        The phases are looked up by their names in PHASES, the list the
+        profiler reports on, so a phase added there is run and timed here.
+        update calls the same methods directly, in the same order, so that a
+        wave with no profiler pays nothing for it.
+
+        The counts recorded are the bolts on screen and the aliens alive at
+        the end of the tick, and the collision tests made (see _countTests),
+        which are worked out between the phases, outside of the times
+        recorded.
+
+        Parameter input: the user input, used to control the ship
+        Precondition: input is an instance of GInput
+
+        Parameter dt: The time since the last update (the length of a tick).
+        Precondition: dt is a float.
+        """
+        clock = time.perf_counter
+        seconds = []
+        tests = 0
+        start = clock()
+        for name in PHASES:
+            phase = getattr(self, name)
+            if name == '_handleShipBolts':
+                tests = self._countTests()
+            mark = clock()
+            if name == '_animateShip' or name == '_animateBolt':
+                phase(input)
+            elif name == '_animateAliens':
+                phase(dt)
+            else:
+                phase()
+            seconds.append(clock() - mark)
+        self._profiler.record(start, seconds, len(self._bolts),
+            self._formation.getCount(), tests)
+
+
+    def _countTests(self):
+        """
+        Returns the collision tests _handleShipBolts and _handleAlienBolts
+        are about to make.
+
+        That is one for each player bolt (a grid lookup), plus one for each
+        alien bolt while there is a ship.
+        """
+        players = 0
+        for bolt in self._bolts:
+            if bolt.isPlayerBolt():
+                players += 1
+        if self._ship != None:
+            return len(self._bolts)
+        return players
+
+
     # DRAW METHOD TO DRAW THE SHIP, ALIENS, DEFENSIVE LINE AND BOLTS
-    def draw(self, view):
+    def draw(self, view, alpha = 1.0):
         """
         Draws the ship, aliens, defensive line, and bolts to the
         application window (view).
 
+        The ship and bolts are drawn alpha of the way from where they were
+        before the last update to where they are now, so that they glide
+        between ticks. The aliens step, so they are drawn where they are.
+
+        The aliens and the bolts are each drawn as one mesh, whatever their
+        number (see render.py). Nothing is moved or rebuilt unless the wave
+        has changed (or alpha has) since the last draw; the same instructions
+        are just drawn again, so a paused frame costs next to nothing. Even
+        when it has changed, the aliens are only moved when they step, their
+        mesh only rebuilt when one dies, and the bolts only when there are
+        some.
+
         Parameter view: the view window
-        Precondition: view is a GView object"""
-        for row in self._aliens:
-            for alien in row:
-                if alien != None:
-                    alien.draw(view)
+        Precondition: view is a GView object
+
+        Parameter alpha: how far the time of this frame is into the next tick
+        Precondition: alpha is a float 0 <= alpha <= 1"""
+        drawn = (self._version, alpha)
+        if drawn != self._drawn:
+            self._drawn = drawn
+            self._alienmesh.sync(self._formation)
+            if self._ship != None:
+                x = self._ship.x
+                if self._shipprev != None:
+                    x = self._shipprev + (x - self._shipprev) * alpha
+                if self._shipsprite.getX() != x:
+                    self._shipsprite.setX(x)
+            self._boltmesh.sync(self._bolts, alpha)
+        self._alienmesh.draw(view)
         if self._ship != None:
-            self._ship.draw(view)
-        self._dline.draw(view)
+            self._shipsprite.draw(view)
+        if self._dline != None:
+            self._dline.draw(view)
+        self._boltmesh.draw(view)
+
+
+    def spawnShip(self):
+        """
+        Places a new ship at the bottom center of the screen.
+        """
+        self._ship = HeadlessShip(x = GAME_WIDTH // 2, y = SHIP_BOTTOM,
+        width = SHIP_WIDTH, height = SHIP_HEIGHT, source = SHIP_IMAGE)
+        self._shipprev = None
+        self._version += 1
+
+
+    def snapshot(self):
+        """
+        Returns the state of this wave, so that restore can go back to it.
+
+        The state is a tuple of numbers, strings, booleans, None and bytes,
+        with no game2d objects in it, so it can be pickled (or written with
+        repr). It is small enough to take on every tick: the rows of the
+        formation are shared with the last snapshot if they did not change
+        (see Formation.snapshot), the bolts are a flat tuple of x, y and
+        velocity, and the random numbers are just the count of alien shots,
+        as _random is seeded again for each one.
+
+        The sounds, sprites and bolt pool are not part of the state.
+        """
+        bolts = []
+        for bolt in self._bolts:
+            bolts.extend((bolt.x, bolt.y, bolt.getVelocity()))
+        shipx = None if self._ship == None else self._ship.x
+        return (self._formation.snapshot(), shipx, self._shipprev,
+            tuple(bolts), self._time, self._last, self._direction,
+            self._interval, self._steps, self._shots, self._lives,
+            self._wavenumber, self._playerwin, self._alienwin, self._speed,
+            self._seed)
+
+
+    def restore(self, state):
+        """
+        Puts this wave back in the given state.
+
+        A wave that is not headless draws the aliens that died since the
+        snapshot again the next time it draws (see FormationMesh.sync).
+
+        Parameter state: the state to restore
+        Precondition: state was returned by snapshot on a wave with the same
+        number of rows and aliens in each row
+        """
+        (formation, shipx, self._shipprev, bolts, self._time, self._last,
+            self._direction, self._interval, self._steps, self._shots,
+            self._lives, self._wavenumber, self._playerwin, self._alienwin,
+            self._speed, self._seed) = state
+        self._version += 1
+        self._formation.restore(formation)
+        if shipx == None:
+            self._ship = None
+        else:
+            shipprev = self._shipprev
+            self.spawnShip()
+            self._ship.x = shipx
+            self._shipprev = shipprev
         for bolt in self._bolts:
-            bolt.draw(view)
+            self._pool.release(bolt)
+        self._bolts = []
+        for i in range(0, len(bolts), 3):
+            self._bolts.append(self._pool.acquire(bolts[i], bolts[i + 1],
+            bolts[i + 2]))
+        self._reseed()
+
+
+    def _reseed(self):
+        """
+        Seeds _random for the next draws, from _seed and _shots.
+
+        All of the draws of one shot come from the same seed, so the random
+        numbers of a wave only depend on how many shots it has taken.
+        """
+        self._random.seed((self._seed << 32) + self._shots)
 
 
-    def _fillAliens(self):
+    def _playSound(self, source):
         """
-        This method fills a 2D array with aliens. All the aliens in a row are
-        of the same image and that image rotates every two rows except for the
-        first.
+        Plays the sound effect in the given file, unless this wave is headless.
+
+        The sound comes from _audio, which loaded it when the game started.
+
+        Parameter source: the sound file to play
+        Precondition: source is a file in SOUND_EFFECTS
         """
-        self._aliens = []
-        for i in range(ALIEN_ROWS):
-            row = []
-            if i % 6 == 0 or i % 6 == 5:
-                img = 0
-            if i % 6 == 1 or i % 6== 2:
-                img = 1
-            if i % 6 == 3 or i % 6== 4:
-                img = 2
-            for j in range(ALIENS_IN_ROW):
-                   row.append(Alien(x=(ALIEN_H_SEP + ALIEN_WIDTH//2) +
-                   j*(ALIEN_H_SEP+ALIEN_WIDTH), y=GAME_HEIGHT - ALIEN_CEILING -
-                   i*(ALIEN_V_SEP+ALIEN_HEIGHT), width= ALIEN_WIDTH, height =
-                   ALIEN_HEIGHT, source = ALIEN_IMAGES[img]))
-            self._aliens.append(row)
-        return self._aliens
+        if not self._headless:
+            self._audio.play(source)
 
 
     def _animateShip(self,input):
@@ -258,7 +654,7 @@ class Wave(object):
         """
         This methods animates the aliens with given horizontal and vertical
         separation between aliens. When the value of _time is greater than
-        ALIEN_SPEED, this method moves the aliens and resets the _time to 0.
+        _speed, this method moves the aliens and resets the _time to 0.
         Otherwise, this method adds the number of seconds that have passed
         since the aliens have moved to _time, and the aliens stay still.
 
@@ -267,7 +663,7 @@ class Wave(object):
         Parameter dt: the time since the last animation frame in seconds.
         Precondition: dt is a float.
         """
-        if self._time * self._wavenumber > ALIEN_SPEED:
+        if self._time * self._wavenumber > self._speed:
             if self._direction == 'right':
                 self._animatealienright()
             if self._direction == 'left':
@@ -284,6 +680,14 @@ class Wave(object):
         from either the ship or the alien, with velocity or BOLT_SPEED or
         -BOLT_SPEED, respectively.
 
+        Bolts are removed once they leave the screen, off the top for player
+        bolts and off the bottom for alien bolts. No bolt is fired while
+        BOLT_LIMIT bolts are already on screen.
+
+        The bolts are moved and culled in a single pass that packs the ones
+        still on screen to the front of _bolts, so no bolt is skipped and
+        nothing is removed from the list while it is being looped over.
+
         Parameter input: the user input, used to control the ship
         Precondition: input is an instance of GInput
         """
@@ -293,20 +697,26 @@ class Wave(object):
             for bolt in self._bolts:
                 if bolt.isPlayerBolt():
                     player = True
-            if player == False:
+            if player == False and len(self._bolts) < BOLT_LIMIT:
                 if self._ship != None:
-                    self._bolts.append(Bolt(x=self._ship.x , y=self._ship.y +
-                    10 , width = BOLT_WIDTH , height = BOLT_HEIGHT, fillcolor
-                    = 'blue' , linewidth = 10, velocity = BOLT_SPEED))
-                    newSound = Sound('pew1.wav')
-                    newSound.play()
-        for bolt in self._bolts:
+                    self._bolts.append(self._pool.acquire(self._ship.x,
+                    self._ship.y + 10, BOLT_SPEED))
+                    self._playSound('pew1.wav')
+        bolts = self._bolts
+        kept = 0
+        for bolt in bolts:
             if bolt.isPlayerBolt():
                 bolt.y += BOLT_SPEED
-                if bolt.y - BOLT_HEIGHT // 2 > GAME_HEIGHT:
-                    self._bolts.remove(bolt)
+                onscreen = bolt.y - BOLT_HEIGHT // 2 <= GAME_HEIGHT
             else:
                 bolt.y -= BOLT_SPEED
+                onscreen = bolt.y + BOLT_HEIGHT // 2 >= 0
+            if onscreen:
+                bolts[kept] = bolt
+                kept += 1
+            else:
+                self._pool.release(bolt)
+        del bolts[kept:]
         self._last = curr_keys
 
 
@@ -317,69 +727,54 @@ class Wave(object):
         until the next bolt is fired.
 
         This method chooses which alien to fire by randomly choosen a bottommost
-        alien in a column."""
-        alienlist = []
-        for col in range(ALIENS_IN_ROW):
-            found = False
-            for row in range(ALIEN_ROWS):
-                if self._aliens[ALIEN_ROWS - 1 - row][col] \
-                != None and found == False:
-                    found = True
-                    alienlist.append(self._aliens[ALIEN_ROWS - 1 - row][col])
-        if len(alienlist)>=1:
-            randaliennum = random.randrange(0, len(alienlist))
-            randaliencol = randaliennum % ALIENS_IN_ROW
-            randalien = alienlist[randaliennum]
-        if self._steps > self._interval :
-            self._bolts.append(Bolt(x = randalien.x, y = randalien.y,
-            width = BOLT_WIDTH, height = BOLT_HEIGHT, fillcolor = 'blue',
-            linewidth = 10 , velocity = -BOLT_SPEED))
-            self._interval = random.randrange(1,BOLT_RATE)
+        alien in a column. The formation keeps the bottommost alien of every
+        column as aliens die, so nothing is looked up until a bolt is fired.
+
+        If BOLT_LIMIT bolts are already on screen, the shot is skipped (and
+        the aliens wait for the next one as if it had been fired)."""
+        if self._steps > self._interval and self._formation.getCount() > 0:
+            self._shots += 1
+            self._reseed()
+            if len(self._bolts) < BOLT_LIMIT:
+                columns = self._formation.getColumns()
+                col = columns[self._random.randrange(0, len(columns))]
+                row = self._formation.getLowest(col)
+                self._bolts.append(self._pool.acquire(
+                float(self._formation.x[row, col]),
+                float(self._formation.y[row, col]), -BOLT_SPEED))
+            self._interval = self._random.randrange(1,BOLT_RATE)
             self._steps = 0
 
 
     def _findFirstAlien(self):
         """
-        This method is a helper function to find the first alien in a row.
+        This method is a helper function to find the x coordinate of the first
+        alien in a row, or None if every alien is dead.
+
+        The formation keeps its bounds up to date, so this takes constant time.
         """
-        x = GAME_WIDTH
-        alienresult = None
-        for row in range(ALIEN_ROWS):
-            for col in range(ALIENS_IN_ROW):
-                if self._aliens[row][col] != None:
-                    if self._aliens[row][col].x<x:
-                        x = self._aliens[row][col].x
-                        alienresult = self._aliens[row][col]
-        return alienresult
+        return self._formation.getLeft()
 
 
     def _findLastAlien(self):
         """
-        This method is a helper function to find the last alien in a row.
+        This method is a helper function to find the x coordinate of the last
+        alien in a row, or None if every alien is dead.
+
+        The formation keeps its bounds up to date, so this takes constant time.
         """
-        x = 0
-        alienresult = None
-        for row in range(ALIEN_ROWS):
-            for col in range(ALIENS_IN_ROW):
-                if self._aliens[row][col] != None:
-                    if self._aliens[row][col].x > x:
-                        x = self._aliens[row][col].x
-                        alienresult = self._aliens[row][col]
-        return alienresult
+        return self._formation.getRight()
 
 
     def _playerWins(self):
         """
         Changes the _playerwin attribrute to True if all aliens have been killed
         and that round of the Wave is over.
+
+        The formation counts its living aliens as they die, so this takes
+        constant time.
         """
-        alivealienlist = []
-        for row in range(ALIEN_ROWS):
-            for col in range(ALIENS_IN_ROW):
-                alivealien=self._aliens[row][col]
-                if (alivealien != None):
-                    alivealienlist.append(alivealien)
-        if len(alivealienlist)==0:
+        if self._formation.getCount() == 0:
             self._playerwin=True
 
 
@@ -387,15 +782,12 @@ class Wave(object):
         """
         Changes the _alienwin attribrute to True if the aliens have breached
         the defensive line.
+
+        Only the lowest living alien can cross the line first, and the
+        formation tracks its y coordinate as it steps down.
         """
-        alienbelowlist = []
-        for row in range(ALIEN_ROWS):
-            for col in range(ALIENS_IN_ROW):
-                alienbelow=self._aliens[row][col]
-                if (alienbelow != None and alienbelow.y \
-                - ALIEN_HEIGHT // 2 < DEFENSE_LINE):
-                    alienbelowlist.append(alienbelow)
-        if len(alienbelowlist)!=0:
+        bottom = self._formation.getBottom()
+        if bottom != None and bottom - ALIEN_HEIGHT // 2 < DEFENSE_LINE:
             self._alienwin=True
 
 
@@ -405,21 +797,15 @@ class Wave(object):
         until they reach reach the right hand border then moves them down
         one step.
         """
-        lastalien = self._findLastAlien()
-        firstalien = self._findFirstAlien()
-        if lastalien != None:
-            if lastalien.x < GAME_WIDTH - ALIEN_H_SEP:
+        lastx = self._findLastAlien()
+        if lastx != None:
+            if lastx < GAME_WIDTH - ALIEN_H_SEP:
                 self._steps += 1
-                for row in self._aliens:
-                    for item in row:
-                        if item != None:
-                            item.x += ALIEN_H_WALK
-            if lastalien.x >= GAME_WIDTH - ALIEN_H_SEP:
+                self._formation.march(ALIEN_H_WALK, 0)
+                lastx += ALIEN_H_WALK
+            if lastx >= GAME_WIDTH - ALIEN_H_SEP:
                 self._steps += 1
-                for row in self._aliens:
-                    for item in row:
-                        if item != None:
-                            item.y -= ALIEN_V_WALK
+                self._formation.march(0, -ALIEN_V_WALK)
                 self._direction = 'left'
 
 
@@ -428,23 +814,14 @@ class Wave(object):
         Helper function for _animateAliens() that moves the aliens to the left
         until they reach reach the left hand border then moves them down
         one step."""
-        lastalien = self._findLastAlien()
-        firstalien = self._findFirstAlien()
-        if firstalien != None:
-            if firstalien.x <= ALIEN_H_SEP + ALIEN_WIDTH // 2:
-                self._steps += 1
-                for row in self._aliens:
-                    for item in row:
-                        if item != None:
-                            item.y -= ALIEN_V_WALK
+        firstx = self._findFirstAlien()
+        if firstx != None:
+            self._steps += 1
+            if firstx <= ALIEN_H_SEP + ALIEN_WIDTH // 2:
+                self._formation.march(0, -ALIEN_V_WALK)
                 self._direction = 'right'
-                print(self._direction)
-            if firstalien.x > ALIEN_H_SEP + ALIEN_WIDTH // 2:
-                self._steps += 1
-                for row in self._aliens:
-                    for item in row:
-                        if item != None:
-                            item.x -= ALIEN_H_WALK
+            else:
+                self._formation.march(-ALIEN_H_WALK, 0)
 
 
     # HELPER METHODS FOR COLLISION DETECTION
@@ -453,11 +830,15 @@ class Wave(object):
         the screen collides with the ship each animation frame, and deletes
         the ship if a collision is detected. If an alien bolt collides with
         a player and the ship is deleted, the number of ship lives is
-        decreased by one."""
+        decreased by one.
+
+        The test is the plain-number one from collision.py, not Ship.collides,
+        so that it is the same (and as fast) whether or not the wave is
+        headless."""
         for bolt in self._bolts:
             if bolt.isPlayerBolt() == False:
                 if self._ship != None:
-                    if self._ship.collides(bolt):
+                    if boltHitsShip(self._ship, bolt):
                         self._ship = None
                         self._lives -= 1
 
@@ -467,18 +848,37 @@ class Wave(object):
         screen collides with any alien each animation frame, and deletes that
         alien if a collision is detected. This method plays a pop sound when the
         alien is hit with the bolt.
+
+        The formation looks up the aliens a bolt could hit from the grid cell
+        it is in, so each bolt costs the same no matter how many aliens remain.
+
+        A bolt that hits an alien is used up, so it kills only that alien
+        (even if it touches two), and it is dropped from _bolts in the same
+        pass that tests it.
         """
-        for bolt in self._bolts:
-            if bolt.isPlayerBolt():
-                for row in range(ALIEN_ROWS):
-                    for col in range(ALIENS_IN_ROW):
-                        alien = self._aliens[row][col]
-                        if alien != None and alien.collides(bolt):
-                            self._aliens[row][col] = None
-                            self._bolts.remove(bolt)
-                            popSound = Sound('pop2.wav')
-                            popSound.play()
+        bolts = self._bolts
+        kept = 0
+        for bolt in bolts:
+            cell = self._formation.hit(bolt)
+            if cell == None:
+                bolts[kept] = bolt
+                kept += 1
             else:
-                if self._ship != None:
-                    self._ship.collides(bolt)
-                    pass
+                self._killAlien(cell[0], cell[1])
+                self._pool.release(bolt)
+        del bolts[kept:]
+
+
+    def _killAlien(self, row, col):
+        """This method kills the alien at row, col, removing it from the
+        formation and playing a pop sound.
+
+        Parameter row: the row of the alien
+        Precondition: row is an int, the row of a living alien
+
+        Parameter col: the column of the alien
+        Precondition: col is an int, the column of a living alien
+        """
+        self._formation.kill(row, col)
+        self._playSound('pop2.wav')
+